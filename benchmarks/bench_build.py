@@ -0,0 +1,368 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+# Tiandao Build Benchmark
+# 用合成数据（结构与 data/data.csv 相同）测量 SiteGenerator 的扩展性：
+#   python benchmarks/bench_build.py                       # 50 / 500 / 2000 个不同的工具
+#   python benchmarks/bench_build.py --sizes 50,500 --threshold 0.2
+#   python benchmarks/bench_build.py --save-baseline      # 把本次结果存为基线
+# 每个场景在独立子进程中运行，记录耗时、pages/sec、本阶段的内存增长、写入字节数，
+# 结果写成 JSON，并与基线比较；超过阈值的回归会让脚本以非零状态退出。
+# 规模按不同工具数计，页面数随 matchups 模式增长：--matchups all 时 2000 个工具约 200 万页，
+# 只适合小规模
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, 'results.json')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+SIZES = (50, 500, 2000)
+# 每个工具名不同；另外按这个比例追加只差大小写的重复行，覆盖 load_data 的去重合并
+DUPLICATE_SHARE = 0.02
+SEED = 20240601
+# 低于这个耗时 / 内存增长的阶段波动太大，不参与回归判断
+NOISE_FLOOR = 0.05
+RSS_NOISE_FLOOR_KB = 8 * 1024
+
+STAGES = ('load_data', 'generate_pages', 'generate_index', 'generate_sitemap', 'copy_assets')
+SCENARIOS = ('run',) + STAGES
+COLUMNS = [
+    'Tool_Name', 'Price', 'Features', 'Pros', 'Cons', 'Verdict', 'Affiliate_Link', 'Description', 'Long_Review',
+]
+
+NAME_PARTS = (
+    ('Rank', 'Link', 'Keyword', 'Site', 'Search', 'Content', 'Traffic', 'Backlink', 'Audit', 'Serp'),
+    ('Pilot', 'Forge', 'Scope', 'Rocket', 'Hawk', 'Lens', 'Wise', 'Metrics', 'Radar', 'Labs'),
+)
+PRICE_FORMATS = (
+    '${:d}/mo', '${:.2f}/mo', '${:d}/month', '{:.2f}', '${:,d}/yr', 'From ${:d}', 'Free', 'Contact sales', '',
+)
+WORDS = (
+    'keyword research backlink audit rank tracking dashboard competitor analysis traffic estimate '
+    'content gap serp features crawl site health reporting integration api agency workflow '
+    'pricing value accuracy database freshness onboarding support export limits'
+).split()
+
+
+def make_sentence(rng, length):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def make_price(rng):
+    fmt = rng.choice(PRICE_FORMATS)
+    if '{' not in fmt:
+        return fmt
+    if '.2f' in fmt:
+        return fmt.format(rng.randint(9, 499) + rng.choice((0.0, 0.95, 0.99)))
+    if ',d' in fmt:
+        return fmt.format(rng.randint(1, 12) * 199)
+    return fmt.format(rng.randint(9, 499))
+
+
+def make_catalog(path, size, duplicate_share=DUPLICATE_SHARE, seed=SEED):
+    """写一个含 size 个不同工具的合成 data.csv，返回总行数。
+
+    另有约 duplicate_share 比例的行重复前面的工具（名称换成大写），load_data 会把它们合并。
+    """
+    rng = random.Random(seed + size)
+    size = max(2, size)
+    names = [f"{rng.choice(NAME_PARTS[0])}{rng.choice(NAME_PARTS[1])} {i}" for i in range(size)]
+    # 重复行跟在原行之后若干行的位置，和真实数据里零散的重复一样
+    repeats = {}
+    for i in rng.sample(range(size), int(size * duplicate_share)):
+        repeats.setdefault(min(size - 1, i + rng.randint(1, 20)), []).append(names[i].upper())
+    rows = []
+    for i, name in enumerate(names):
+        rows.append(name)
+        rows.extend(repeats.get(i, ()))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(COLUMNS)
+        for name in rows:
+            writer.writerow([
+                name,
+                make_price(rng),
+                '',
+                '; '.join(make_sentence(rng, 4)[:-1] for _ in range(5)),
+                '; '.join(make_sentence(rng, 5)[:-1] for _ in range(3)),
+                make_sentence(rng, 14),
+                f"https://example.com/{name.lower().replace(' ', '-')}",
+                make_sentence(rng, 18),
+                ' '.join(make_sentence(rng, rng.randint(12, 24)) for _ in range(rng.randint(8, 30))),
+            ])
+    return len(rows)
+
+
+def dir_usage(path):
+    """返回 (总字节数, HTML 文件数)。"""
+    total = pages = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                continue
+            pages += name.endswith('.html')
+    return total, pages
+
+
+def current_rss_kb(field='VmRSS'):
+    """/proc/self/status 中的 VmRSS / VmHWM（KB）；没有 /proc 时返回 None。"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """把进程的峰值 RSS (VmHWM) 重置为当前值（Linux），之后读到的峰值只属于被测步骤。"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def measure(scenario, catalog, output_dir, workers, matchups=None, locales=None):
+    """在当前进程中运行一个场景（由子进程调用）。"""
+    from generator import SiteGenerator
+    from locales import resolve_locales
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    generator = SiteGenerator(data_path=catalog, output_dir=output_dir)
+    generator.config.setdefault('build', {})['workers'] = workers
+    if matchups:
+        generator.config.setdefault('matchups', {})['mode'] = matchups
+    if locales:
+        generator.config['locales'] = locales
+        generator.locales = resolve_locales(generator.config)
+    state = {}
+
+    def prepare():
+        generator.prepare_build(state['tools'], False)
+        state['tools'] = generator.prepare_tools(state['tools'])
+
+    if scenario == 'run':
+        steps = [('run', lambda: generator.run(incremental=False))]
+    else:
+        # 目标阶段之前的步骤只做准备，不计时
+        steps = [
+            ('load_data', lambda: state.update(tools=generator.load_data())),
+            ('prepare', prepare),
+            ('generate_pages', lambda: generator.generate_pages(state['tools'])),
+            ('generate_index', lambda: generator.generate_index(state['tools'])),
+            ('generate_sitemap', generator.generate_sitemap),
+            ('copy_assets', generator.copy_assets),
+        ]
+
+    wall = bytes_written = pages = 0
+    rss_growth = None
+    for name, step in steps:
+        if name != scenario:
+            step()
+            continue
+        bytes_before, pages_before = dir_usage(output_dir)
+        # ru_maxrss 是整个进程的峰值，会包含前面准备阶段的占用；
+        # 这里记录本步骤期间的峰值相对开始时 RSS 的增长
+        rss_before = current_rss_kb()
+        if rss_before is None or not reset_peak_rss():
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        step()
+        wall = time.perf_counter() - start
+        peak = current_rss_kb('VmHWM') or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_growth = max(0, peak - rss_before)
+        bytes_after, pages_after = dir_usage(output_dir)
+        bytes_written, pages = bytes_after - bytes_before, pages_after - pages_before
+        break
+
+    return {
+        'wall': round(wall, 4),
+        'pages': pages,
+        'pages_per_sec': round(pages / wall, 1) if pages and wall else 0,
+        'rss_growth_kb': rss_growth,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'peak_rss_children_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        'bytes_written': bytes_written,
+    }
+
+
+def run_scenario(scenario, catalog, output_dir, workers, matchups=None, locales=None, verbose=False):
+    fd, result_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    command = [sys.executable, os.path.abspath(__file__), '--child', scenario, '--catalog', catalog,
+               '--output-dir', output_dir, '--workers', str(workers), '--result', result_path]
+    if matchups:
+        command += ['--matchups', matchups]
+    if locales:
+        command += ['--locales', ','.join(locales)]
+    try:
+        subprocess.run(
+            command,
+            check=True, cwd=ROOT,
+            stdout=None if verbose else subprocess.DEVNULL,
+        )
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def run_suite(sizes, workers, repeat, matchups=None, locales=None, verbose=False, keep=False):
+    from normalize import Normalizer
+    from toolstore import ToolStore
+
+    workdir = tempfile.mkdtemp(prefix='tiandao-bench-')
+    results = {}
+    try:
+        for size in sizes:
+            catalog = os.path.join(workdir, f'catalog-{size}.csv')
+            rows = make_catalog(catalog, size)
+            # 先编译快照，load_data 测的是日常（快照已存在）的加载路径
+            ToolStore.open(catalog, transform=Normalizer()).close()
+            output_dir = os.path.join(workdir, f'output-{size}')
+            print(f"📏 {size} tools ({rows} rows)")
+            entry = {'tools': size, 'rows': rows, 'stages': {}}
+            for scenario in SCENARIOS:
+                # 重复多次时取耗时最短的一次
+                runs = [
+                    run_scenario(scenario, catalog, output_dir, workers, matchups, locales, verbose) for _ in range(repeat)
+                ]
+                best = min(runs, key=lambda r: r['wall'])
+                entry['stages'][scenario] = best
+                print(f"   {scenario:<17} {best['wall']:>9.3f}s  {best['pages_per_sec']:>9} pages/s  "
+                      f"{(best['rss_growth_kb'] or 0) // 1024:>+5} MB  {best['bytes_written'] / 1e6:>9.2f} MB written")
+            results[str(size)] = entry
+    finally:
+        if keep:
+            print(f"📂 Benchmark files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """返回回归列表：耗时或本阶段内存增长比基线高出 threshold（比例）以上。"""
+    regressions = []
+    for size, entry in results.items():
+        base_entry = baseline.get('results', {}).get(size)
+        if not base_entry:
+            continue
+        for scenario, metrics in entry['stages'].items():
+            base = base_entry['stages'].get(scenario)
+            if not base:
+                continue
+            if base['wall'] >= NOISE_FLOOR and metrics['wall'] > base['wall'] * (1 + threshold):
+                regressions.append((size, scenario, 'wall', base['wall'], metrics['wall']))
+            # 只比较本阶段的内存增长；旧基线没有这个字段时跳过
+            old, new = base.get('rss_growth_kb'), metrics.get('rss_growth_kb')
+            if old is None or new is None or new < RSS_NOISE_FLOOR_KB:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append((size, scenario, 'rss_growth_kb', old, new))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Tiandao site build on synthetic catalogs.")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in SIZES),
+                        help="comma-separated catalog sizes (distinct tools)")
+    parser.add_argument('--workers', type=int, default=1, help="build.workers for the runs (default 1)")
+    parser.add_argument('--matchups', choices=('all', 'topk'),
+                        help="override matchups.mode from config.json")
+    parser.add_argument('--locales', help="comma-separated locales to render (overrides config.json), e.g. en,es,pt")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per scenario; the fastest is kept")
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help="where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed slowdown / RSS growth before flagging a regression (0.15 = 15%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--keep', action='store_true', help="keep the synthetic catalogs and outputs")
+    parser.add_argument('--verbose', action='store_true', help="show generator output")
+    # 子进程内部使用
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--catalog', help=argparse.SUPPRESS)
+    parser.add_argument('--output-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    locales = [code.strip() for code in args.locales.split(',') if code.strip()] if args.locales else None
+
+    if args.child:
+        metrics = measure(args.child, args.catalog, args.output_dir, args.workers, args.matchups, locales)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    results = run_suite(
+        sizes, args.workers, max(1, args.repeat), args.matchups, locales, args.verbose, args.keep
+    )
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'matchups': args.matchups,
+        'locales': locales,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️  No baseline found; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"✅ No regressions beyond {args.threshold:.0%} against baseline {baseline.get('revision')}.")
+        return 0
+    print(f"❌ {len(regressions)} regressions beyond {args.threshold:.0%}:")
+    for size, scenario, metric, old, new in regressions:
+        print(f"   {size} tools / {scenario}: {metric} {old} -> {new} ({new / max(old, 1) - 1:+.0%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import sys
 import os
-import runpy
 import glob
+import pstats
+import argparse
+import cProfile
 
 # 设置路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,50 +14,92 @@ output_dir = os.path.join(current_dir, 'output') # 假设默认输出目录是 o
 if src_dir not in sys.path:
     sys.path.append(src_dir)
 
-print("="*40)
-print("🚀 Tiandao Project Diagnostics Mode")
-print(f"📂 Working Directory: {current_dir}")
-print(f"🔎 Looking for data at: {data_path}")
-
-# 1. 检查数据是否存在
-if os.path.exists(data_path):
-    print("✅ Data file FOUND.")
-    with open(data_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        print(f"📊 Data line count: {len(lines)}")
-else:
-    print("❌ CRITICAL: Data file NOT found! Generator will likely do nothing.")
-    # 尝试列出当前目录有什么，帮我们找文件
-    print("Files in current dir:", os.listdir(current_dir))
-    if os.path.exists(os.path.join(current_dir, 'data')):
-         print("Files in data dir:", os.listdir(os.path.join(current_dir, 'data')))
-
-print("="*40)
-print("▶️  Running Generator...")
-
-try:
-    # 运行生成器
-    runpy.run_module('src.generator', run_name='__main__')
-    print("✅ Generator execution finished.")
+from tracing import PROFILE_NAME, default_report_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiandao site build with diagnostics.")
+    parser.add_argument('--profile', action='store_true', help="run the build under cProfile")
+    parser.add_argument('--report', default=default_report_path(output_dir), help="where to write the JSON build report")
+    parser.add_argument('--serve', action='store_true', help="start the local preview server instead of building")
+    parser.add_argument('--port', type=int, default=8000, help="preview server port (with --serve)")
+    args = parser.parse_args()
+
+    if args.serve:
+        # 预览模式：按请求渲染页面，不写 output/（见 src/preview.py）
+        from preview import serve
+        serve(port=args.port)
+        return
 
     print("="*40)
-    print("🕵️ Post-Run Check:")
-    # 检查输出了什么
-    if os.path.exists(output_dir):
-        files = glob.glob(os.path.join(output_dir, '*.html'))
-        print(f"📁 Output Directory exists: {output_dir}")
-        print(f"📄 Generated HTML files: {len(files)}")
-        if len(files) > 0:
-            print(f"   Example: {files[0]}")
-        else:
-            print("⚠️  Warning: Output directory is empty!")
+    print("🚀 Tiandao Project Diagnostics Mode")
+    print(f"📂 Working Directory: {current_dir}")
+    print(f"🔎 Looking for data at: {data_path}")
+
+    # 1. 检查数据是否存在
+    if os.path.exists(data_path):
+        print("✅ Data file FOUND.")
+        # 行数直接取自二进制快照（CSV 未变化时不用重新读取整个文件）
+        from toolstore import ToolStore
+        print(f"📊 Data row count: {len(ToolStore.open(data_path))}")
     else:
-        print(f"❌ Output directory not found at: {output_dir}")
-        print("   Did the generator save to a different folder? (e.g., 'dist', 'site')")
-        print("   Current dirs:", [d for d in os.listdir(current_dir) if os.path.isdir(d)])
-
-except Exception as e:
-    print(f"❌ Error during execution: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+        print("❌ CRITICAL: Data file NOT found! Generator will likely do nothing.")
+        # 尝试列出当前目录有什么，帮我们找文件
+        print("Files in current dir:", os.listdir(current_dir))
+        if os.path.exists(os.path.join(current_dir, 'data')):
+             print("Files in data dir:", os.listdir(os.path.join(current_dir, 'data')))
+
+    print("="*40)
+    print("▶️  Running Generator...")
+
+    try:
+        # 运行生成器（阶段耗时、页面延迟等写入 JSON 报告）
+        from generator import SiteGenerator
+        generator = SiteGenerator()
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.runcall(generator.run, report_path=args.report)
+            profile_path = os.path.join(os.path.dirname(os.path.abspath(args.report)), PROFILE_NAME)
+            profiler.dump_stats(profile_path)
+            stats = pstats.Stats(profiler)
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:25]
+            generator.trace.extra['profile'] = {
+                'file': profile_path,
+                'top_cumulative': [
+                    {'function': f"{func[0]}:{func[1]}({func[2]})", 'calls': nc, 'cumtime': round(ct, 4)}
+                    for func, (cc, nc, tt, ct, callers) in top
+                ],
+            }
+            generator.trace.write(args.report)
+            print(f"🔬 Profile saved to {profile_path} (inspect with: python -m pstats {profile_path})")
+        else:
+            generator.run(report_path=args.report)
+        print("✅ Generator execution finished.")
+        print(f"📈 Build report: {args.report}")
+
+        print("="*40)
+        print("🕵️ Post-Run Check:")
+        # 检查输出了什么
+        if os.path.exists(output_dir):
+            files = glob.glob(os.path.join(output_dir, '*.html'))
+            print(f"📁 Output Directory exists: {output_dir}")
+            print(f"📄 Generated HTML files: {len(files)}")
+            if len(files) > 0:
+                print(f"   Example: {files[0]}")
+            else:
+                print("⚠️  Warning: Output directory is empty!")
+        else:
+            print(f"❌ Output directory not found at: {output_dir}")
+            print("   Did the generator save to a different folder? (e.g., 'dist', 'site')")
+            print("   Current dirs:", [d for d in os.listdir(current_dir) if os.path.isdir(d)])
+
+    except Exception as e:
+        print(f"❌ Error during execution: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+# 多进程渲染的 worker 可能重新导入本模块（spawn），构建只能在直接运行时执行
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import re
+
+# Tiandao Affiliate Resolver
+# 把 affiliate_map 编译成一个多模式正则，每个工具只解析一次
+#
+# affiliate_map 的值可以是链接字符串，也可以是 {"link": "...", "priority": 10}
+# 多个 key 同时命中时的优先级（确定性）：
+#   1. priority 高者优先（默认 0）
+#   2. key 更长（更具体）者优先
+#   3. 在 config.json 中出现得更早者优先
+
+
+class AffiliateResolver:
+    def __init__(self, affiliate_map):
+        self.entries = {}
+        ranked = []
+        for order, (key, value) in enumerate((affiliate_map or {}).items()):
+            if isinstance(value, dict):
+                link, priority = value.get('link'), int(value.get('priority', 0))
+            else:
+                link, priority = value, 0
+            needle = str(key).strip().lower()
+            if not needle or not link or needle in self.entries:
+                continue
+            rank = (-priority, -len(needle), order)
+            self.entries[needle] = (rank, key, link)
+            ranked.append((rank, needle))
+
+        ranked.sort()
+        if ranked:
+            # 零宽前瞻：每个位置都尝试匹配，按优先级排好的分支保证该位置取到最优 key
+            alternation = "|".join(re.escape(needle) for _, needle in ranked)
+            self.pattern = re.compile(f"(?=({alternation}))")
+        else:
+            self.pattern = None
+
+    def match(self, tool_name):
+        """返回命中的合作方 key；没有命中返回 None。"""
+        if self.pattern is None:
+            return None
+        best = None
+        for m in self.pattern.finditer(str(tool_name).strip().lower()):
+            entry = self.entries[m.group(1)]
+            if best is None or entry[0] < best[0]:
+                best = entry
+        return best[1] if best else None
+
+    def resolve(self, tool_name, original_link):
+        key = self.match(tool_name)
+        if key is None:
+            return original_link
+        return self.entries[key.strip().lower()][2]
+
+    def report(self, tools):
+        """合作方 -> 命中的工具列表，以及未命中的工具。"""
+        matched, unmatched = {}, []
+        for tool in tools:
+            name = str(tool.get('Tool_Name', 'Unknown')).strip()
+            key = self.match(name)
+            if key is None:
+                unmatched.append(name)
+            elif name not in matched.setdefault(key, []):
+                matched[key].append(name)
+        return {'matched': matched, 'unmatched': sorted(set(unmatched))}
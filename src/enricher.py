@@ -1,65 +1,55 @@
-import pandas as pd
-from openai import OpenAI
-import json
+from openai import AsyncOpenAI
+import asyncio
+import random
 import os
 import time
+from llm_cache import ResponseCache, salvage_json
+from toolstore import ToolStore, is_missing, write_rows
+from tracing import BuildTrace
 
-def enrich_data(raw_file, enriched_file):
-    print("🧠 [Enricher] Checking data integrity...")
-    
-    if not os.path.exists(raw_file):
-        print("❌ Error: Raw data file not found.")
-        return
+# Tiandao Enricher v2.0 (Async)
+# 并发 + 令牌桶限速 + 指数退避重试 + 批量落盘 + 本地回复缓存
 
-    try:
-        df_raw = pd.read_csv(raw_file)
-    except Exception as e:
-        print(f"❌ Error reading raw file: {e}")
-        return
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+DEFAULT_MODEL = "deepseek-chat"
+TEMPERATURE = 0.1
+CACHE_NAME = 'llm_cache.sqlite'
+# API 调用、重试、缓存命中等计数的 JSON 报告，默认写在 enriched CSV 旁边
+REPORT_NAME = 'enrich_report.json'
 
-    # 初始化 DataFrame，增加多语言列
-    cols = list(df_raw.columns) + [
-        'Pros', 'Cons', 'Verdict', 'Rating',
-        'Pros_ES', 'Cons_ES', 'Verdict_ES', # 西班牙语
-        'Pros_PT', 'Cons_PT', 'Verdict_PT'  # 葡萄牙语
-    ]
-    
-    if os.path.exists(enriched_file) and os.path.getsize(enriched_file) > 0:
-        try:
-            df_enriched = pd.read_csv(enriched_file)
-        except:
-            df_enriched = pd.DataFrame(columns=cols)
-    else:
-        df_enriched = pd.DataFrame(columns=cols)
+# enriched CSV 在原始列之后追加的多语言列
+ENRICH_COLUMNS = [
+    'Pros', 'Cons', 'Verdict', 'Rating',
+    'Pros_ES', 'Cons_ES', 'Verdict_ES', # 西班牙语
+    'Pros_PT', 'Cons_PT', 'Verdict_PT'  # 葡萄牙语
+]
 
-    # 确保列存在
-    for col in cols:
-        if col not in df_enriched.columns:
-            df_enriched[col] = ""
 
-    api_key = os.environ.get("DEEPSEEK_API_KEY")
-    if not api_key:
-        print("⚠️ No DEEPSEEK_API_KEY found. Skipping.")
-        return
+class TokenBucket:
+    """令牌桶限速：平均每秒 rate 次请求，允许 capacity 次突发。"""
 
-    client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com")
-    data_changed = False
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
 
-    for index, row in df_raw.iterrows():
-        tool_name = str(row['Tool_Name'])
-        if "!" in tool_name or "[" in tool_name or len(tool_name) < 2: continue
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
 
-        # 检查是否已存在且有外语数据
-        if tool_name in df_enriched['Tool_Name'].values:
-            existing = df_enriched[df_enriched['Tool_Name'] == tool_name].iloc[0]
-            # 如果英文和葡语都有了，就跳过
-            if pd.notna(existing.get('Verdict')) and pd.notna(existing.get('Verdict_PT')):
-                continue
 
-        print(f"   🤖 AI Processing (Multi-lang): {tool_name}...")
-        
-        # 核弹级 Prompt：一次生成三种语言
-        prompt = f"""
+def build_prompt(tool_name):
+    # 核弹级 Prompt：一次生成三种语言
+    return f"""
         Analyze software "{tool_name}". Return JSON with English(default), Spanish(_es), Portuguese(_pt):
         {{
             "pros": ["3 short pros EN"], "cons": ["3 short cons EN"], "verdict": "Verdict EN",
@@ -69,43 +59,313 @@ def enrich_data(raw_file, enriched_file):
         }}
         JSON ONLY. No markdown.
         """
-        
+
+
+def default_cache_path(enriched_file):
+    return os.path.join(os.path.dirname(os.path.abspath(enriched_file)), CACHE_NAME)
+
+
+def default_report_path(enriched_file):
+    return os.path.join(os.path.dirname(os.path.abspath(enriched_file)), REPORT_NAME)
+
+
+def cached_result(cache, tool_name, model):
+    """从缓存取解析结果；上次解析失败的原始回复会再尝试修复一次。"""
+    prompt = build_prompt(tool_name)
+    hit = cache.get(model, prompt, TEMPERATURE)
+    if hit is None:
+        return None
+    raw, parsed = hit
+    if parsed is None:
+        parsed = salvage_json(raw)
+        if parsed is not None:
+            cache.put(model, prompt, TEMPERATURE, raw, parsed, tool_name)
+    return parsed
+
+
+def apply_result(row, data):
+    new_row = dict(row)
+    new_row['Rating'] = str(data.get('rating', '4.5'))
+
+    # English
+    new_row['Pros'] = " | ".join(data.get('pros', []))
+    new_row['Cons'] = " | ".join(data.get('cons', []))
+    new_row['Verdict'] = data.get('verdict', '')
+
+    # Spanish
+    new_row['Pros_ES'] = " | ".join(data.get('pros_es', []))
+    new_row['Cons_ES'] = " | ".join(data.get('cons_es', []))
+    new_row['Verdict_ES'] = data.get('verdict_es', '')
+
+    # Portuguese
+    new_row['Pros_PT'] = " | ".join(data.get('pros_pt', []))
+    new_row['Cons_PT'] = " | ".join(data.get('cons_pt', []))
+    new_row['Verdict_PT'] = data.get('verdict_pt', '')
+    return new_row
+
+
+def needs_enrichment(tool_name, index):
+    if "!" in tool_name or "[" in tool_name or len(tool_name) < 2:
+        return False
+    existing = index.get(tool_name)
+    # 如果英文和葡语都有了，就跳过
+    if existing is not None and not is_missing(existing.get('Verdict')) and not is_missing(existing.get('Verdict_PT')):
+        return False
+    return True
+
+
+class EnrichmentCheckpoint:
+    """内存中的已处理索引 (Tool_Name -> row)，每 batch_size 条结果才写一次 CSV。
+
+    并发请求按完成顺序返回，写盘时按原始 CSV 中的位置排序：行顺序决定对战页的左右和文件名，
+    必须每次一致。不在原始 CSV 里的旧行按原顺序排在最后。
+    """
+
+    def __init__(self, enriched_file, columns, existing_rows, batch_size, raw_names=()):
+        self.enriched_file = enriched_file
+        self.columns = columns
+        self.batch_size = max(1, batch_size)
+        self.index = {}
+        self.order = []
+        self.rank = {}
+        for name in raw_names:
+            self.rank.setdefault(str(name), len(self.rank))
+        for row in existing_rows:
+            self.put(row)
+        self.pending = 0
+
+    def put(self, row):
+        name = str(row['Tool_Name'])
+        if name not in self.index:
+            self.order.append(name)
+        self.index[name] = row
+
+    def add(self, row):
+        self.put(row)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending == 0:
+            return
+        tail = len(self.rank)
+        names = sorted(self.order, key=lambda name: self.rank.get(name, tail))
+        write_rows(self.enriched_file, self.columns, [self.index[name] for name in names])
+        print(f"   💾 Checkpoint: {len(self.order)} rows saved.")
+        self.pending = 0
+
+
+async def request_enrichment(client, bucket, semaphore, tool_name, model, retries, backoff, cache, trace):
+    prompt = build_prompt(tool_name)
+    async with semaphore:
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            trace.count('api_calls')
+            try:
+                response = await client.chat.completions.create(
+                    model=model, messages=[{"role": "user", "content": prompt}], temperature=TEMPERATURE
+                )
+                raw = response.choices[0].message.content
+                # 解析失败也保存原始回复，下次可以直接修复而不用再付费
+                parsed = salvage_json(raw)
+                cache.put(model, prompt, TEMPERATURE, raw, parsed, tool_name)
+                if parsed is None:
+                    raise ValueError("Response is not valid JSON")
+                return parsed
+            except Exception as e:
+                trace.count('api_errors')
+                if attempt >= retries:
+                    raise
+                trace.count('api_retries')
+                delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+                print(f"   🔁 Retry {attempt + 1}/{retries} for {tool_name} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+
+def close_cache(cache, trace):
+    """按 TTL / 体积上限淘汰旧回复后关闭缓存；每条退出路径都要经过这里，否则缓存文件只增不减。"""
+    try:
+        evicted = cache.evict()
+        if evicted:
+            trace.count('cache_evicted', evicted)
+            print(f"   🧹 Evicted {evicted} cached responses.")
+    finally:
+        cache.close()
+
+
+def read_raw(raw_file):
+    if not os.path.exists(raw_file):
+        print("❌ Error: Raw data file not found.")
+        return None
+    try:
+        return ToolStore.open(raw_file)
+    except Exception as e:
+        print(f"❌ Error reading raw file: {e}")
+        return None
+
+
+def read_existing(raw, enriched_file):
+    """已有的 enriched CSV：返回 (列, 行)。已有列顺序不变，缺的列追加在后面。"""
+    columns, existing_rows = list(raw.columns) + ENRICH_COLUMNS, []
+    if os.path.exists(enriched_file) and os.path.getsize(enriched_file) > 0:
         try:
-            response = client.chat.completions.create(
-                model="deepseek-chat", messages=[{"role": "user", "content": prompt}], temperature=0.1
-            )
-            content = response.choices[0].message.content.strip().replace("```json", "").replace("```", "")
-            data = json.loads(content)
-            
-            new_row = row.copy()
-            new_row['Rating'] = str(data.get('rating', '4.5'))
-            
-            # English
-            new_row['Pros'] = " | ".join(data.get('pros', []))
-            new_row['Cons'] = " | ".join(data.get('cons', []))
-            new_row['Verdict'] = data.get('verdict', '')
-            
-            # Spanish
-            new_row['Pros_ES'] = " | ".join(data.get('pros_es', []))
-            new_row['Cons_ES'] = " | ".join(data.get('cons_es', []))
-            new_row['Verdict_ES'] = data.get('verdict_es', '')
-            
-            # Portuguese
-            new_row['Pros_PT'] = " | ".join(data.get('pros_pt', []))
-            new_row['Cons_PT'] = " | ".join(data.get('cons_pt', []))
-            new_row['Verdict_PT'] = data.get('verdict_pt', '')
-            
-            # 合并
-            # 先删除旧的同名行（如果有）
-            df_enriched = df_enriched[df_enriched['Tool_Name'] != tool_name]
-            df_enriched = pd.concat([df_enriched, pd.DataFrame([new_row])], ignore_index=True)
-            
-            df_enriched.to_csv(enriched_file, index=False)
-            data_changed = True
-            time.sleep(0.5)
-            
+            enriched = ToolStore.open(enriched_file)
+            columns = enriched.columns + [col for col in columns if col not in enriched.columns]
+            existing_rows = enriched.rows()
         except Exception as e:
-            print(f"   ❌ Failed: {e}")
+            print(f"⚠️ Could not read {enriched_file}, starting fresh: {e}")
+    return columns, existing_rows
+
+
+def replay_from_cache(raw_file, enriched_file, cache_path=None, model=DEFAULT_MODEL, trace=None,
+                      cache_ttl=None, cache_max_bytes=None):
+    """完全离线：只用缓存中的回复重建 enriched CSV（新增语言列时几乎零成本）。"""
+    print("🧠 [Enricher] Replaying enrichment from cache...")
+    trace = trace or BuildTrace()
+    raw = read_raw(raw_file)
+    if raw is None:
+        return
+
+    # 以现有的 enriched CSV 为底：缓存里没有的工具和额外的列原样保留
+    columns, existing_rows = read_existing(raw, enriched_file)
+    checkpoint = EnrichmentCheckpoint(
+        enriched_file, columns, existing_rows, 1, [row['Tool_Name'] for row in raw.rows()],
+    )
+    cache = ResponseCache(cache_path or default_cache_path(enriched_file), ttl=cache_ttl, max_bytes=cache_max_bytes)
+    replayed, missing, seen = 0, [], set()
+    try:
+        for row in raw.rows():
+            tool_name = str(row['Tool_Name'])
+            if tool_name in seen or not needs_enrichment(tool_name, {}):
+                continue
+            seen.add(tool_name)
+            data = cached_result(cache, tool_name, model)
+            if data is None:
+                missing.append(tool_name)
+                continue
+            base = dict(checkpoint.index.get(tool_name, {}))
+            base.update(row)
+            checkpoint.put(apply_result(base, data))
+            checkpoint.pending += 1
+            replayed += 1
+        checkpoint.flush()
+    finally:
+        trace.count('cache_hits', cache.hits)
+        trace.count('cache_misses', len(missing))
+        close_cache(cache, trace)
 
-    if data_changed:
-        print("✅ Multi-language data updated.")
\ No newline at end of file
+    print(f"✅ Replayed {replayed} tools from cache, {len(missing)} missing.")
+    if missing:
+        print(f"   ⚠️ Not in cache: {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
+
+
+async def enrich_data_async(raw_file, enriched_file, concurrency=8, rate=5.0, batch_size=20,
+                            retries=3, backoff=1.0, base_url=None, api_key=None, model=DEFAULT_MODEL,
+                            cache_path=None, cache_ttl=None, cache_max_bytes=None, trace=None):
+    print("🧠 [Enricher] Checking data integrity...")
+    trace = trace or BuildTrace()
+
+    with trace.stage('enrich.load'):
+        raw = read_raw(raw_file)
+        if raw is None:
+            return
+
+        columns, existing_rows = read_existing(raw, enriched_file)
+        checkpoint = EnrichmentCheckpoint(
+            enriched_file, columns, existing_rows, batch_size, [row['Tool_Name'] for row in raw.rows()],
+        )
+
+    cache = ResponseCache(cache_path or default_cache_path(enriched_file), ttl=cache_ttl, max_bytes=cache_max_bytes)
+    # 缓存命中、没有 API key、请求完成或出错，都要在退出前做一次淘汰
+    try:
+        todo, queued = [], set()
+        with trace.stage('enrich.cache'):
+            for row in raw.rows():
+                tool_name = str(row['Tool_Name'])
+                if tool_name in queued or not needs_enrichment(tool_name, checkpoint.index):
+                    continue
+                queued.add(tool_name)
+                # 缓存命中的直接落盘，不走网络
+                data = cached_result(cache, tool_name, model)
+                if data is not None:
+                    checkpoint.add(apply_result(row, data))
+                else:
+                    todo.append(row)
+        trace.count('cache_hits', cache.hits)
+        trace.count('cache_misses', len(todo))
+
+        if cache.hits:
+            print(f"   ⚡ {cache.hits} tools served from the response cache.")
+        if not todo:
+            checkpoint.flush()
+            print("✅ Nothing to enrich.")
+            return
+
+        api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
+        if not api_key:
+            checkpoint.flush()
+            print("⚠️ No DEEPSEEK_API_KEY found. Skipping.")
+            return
+
+        print(f"   🤖 AI Processing (Multi-lang): {len(todo)} tools, concurrency {concurrency}, {rate}/s...")
+        # 重试由我们自己控制，关闭 SDK 内置重试
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url or os.environ.get("DEEPSEEK_BASE_URL", DEFAULT_BASE_URL),
+            max_retries=0,
+        )
+        bucket = TokenBucket(rate)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(row):
+            tool_name = str(row['Tool_Name'])
+            try:
+                data = await request_enrichment(
+                    client, bucket, semaphore, tool_name, model, retries, backoff, cache, trace
+                )
+                return row, data, None
+            except Exception as e:
+                return row, None, e
+
+        succeeded = failed = 0
+        with trace.stage('enrich.requests'):
+            try:
+                for task in asyncio.as_completed([run_one(row) for row in todo]):
+                    row, data, error = await task
+                    if error is not None:
+                        print(f"   ❌ Failed: {row['Tool_Name']}: {error}")
+                        failed += 1
+                        continue
+                    checkpoint.add(apply_result(row, data))
+                    succeeded += 1
+            finally:
+                trace.count('tools_enriched', succeeded)
+                trace.count('tools_failed', failed)
+                checkpoint.flush()
+                await client.close()
+
+        if succeeded:
+            print(f"✅ Multi-language data updated: {succeeded} enriched, {failed} failed.")
+    finally:
+        close_cache(cache, trace)
+
+
+def enrich_data(raw_file, enriched_file, replay=False, trace=None, report_path=None, **options):
+    """运行 enrichment 并把 trace 写成 JSON 报告（report_path 默认为 enriched CSV 旁的 enrich_report.json）。
+
+    返回本次运行的 BuildTrace（API 调用、重试、缓存命中等计数和阶段耗时）。
+    """
+    trace = trace or BuildTrace()
+    if replay:
+        with trace.stage('enrich.replay'):
+            replay_from_cache(
+                raw_file, enriched_file, options.get('cache_path'), options.get('model', DEFAULT_MODEL), trace,
+                options.get('cache_ttl'), options.get('cache_max_bytes'),
+            )
+    else:
+        asyncio.run(enrich_data_async(raw_file, enriched_file, trace=trace, **options))
+    trace.summary()
+    report_path = trace.write(report_path or default_report_path(enriched_file))
+    print(f"📈 Enrich report: {report_path}")
+    return trace
\ No newline at end of file
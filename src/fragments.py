@@ -0,0 +1,50 @@
+import re
+
+from locales import DEFAULT_LOCALE, Locale
+from normalize import monthly_prices
+
+# Tiandao Fragment Cache
+# 每个工具在对战页中可复用的片段（Deep Dive、Verdict、价格、首条优点）每次构建只格式化一次，
+# 一个工具出现在 n-1 个对战页里，不再重复拼接 n-1 次
+
+# data.csv 的 Pros 用 ';' 分隔，enricher 生成的用 ' | '
+PROS_SEP_RE = re.compile(r'\s*[;|]\s*')
+
+
+class ToolFragments:
+    __slots__ = ('name', 'deep_dive', 'price', 'price_value', 'top_pro', 'summary')
+
+    def __init__(self, tool, price_value=None, strings=None):
+        strings = strings or Locale(DEFAULT_LOCALE).strings
+        self.name = str(tool.get('Tool_Name', 'Unknown')).strip()
+        self.deep_dive = (
+            f"<p>{tool.get('Long_Review', strings['review_pending'])}</p>\n"
+            f"                <div class=\"verdict-box\"><strong>{strings['verdict_label']}</strong> {tool.get('Verdict', '')}</div>"
+        )
+        self.price = tool.get('Price', 'N/A')
+        self.price_value = price_value
+        self.top_pro = PROS_SEP_RE.split(str(tool.get('Pros', '')))[0]
+        self.summary = str(tool.get('Description', ''))[:100]
+
+
+class FragmentCache:
+    """与 tools 列表一一对应的片段缓存，每个语言一份：(本地化后的工具记录, 片段)。"""
+
+    def __init__(self, tools, locales=None):
+        # 月付价格（规范化阶段已解析好），供价格图使用；各语言共用
+        prices = monthly_prices(tools)
+        self.by_locale = {}
+        for locale in locales or [Locale(DEFAULT_LOCALE)]:
+            records = [locale.localize(tool) for tool in tools]
+            fragments = [ToolFragments(record, price, locale.strings) for record, price in zip(records, prices)]
+            self.by_locale[locale.code] = (records, fragments)
+        self.fragments = self.by_locale[DEFAULT_LOCALE][1]
+
+    def locale(self, code):
+        return self.by_locale[code]
+
+    def __getitem__(self, index):
+        return self.fragments[index]
+
+    def __len__(self):
+        return len(self.fragments)
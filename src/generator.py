@@ -1,23 +1,49 @@
 import os
-import pandas as pd
 import json
-from jinja2 import Environment, FileSystemLoader
-from itertools import combinations
+from jinja2 import Environment, FileSystemBytecodeCache
 import datetime
 import shutil
+import time
+from manifest import BuildManifest, compute_tool_hashes, diff_tools, hash_file, hash_text
+from parallel import render_parallel, resolve_workers
+from indexer import SiteIndexer
+from affiliates import AffiliateResolver
+from fragments import FragmentCache, ToolFragments
+from locales import resolve_locales
+from visualizer import render_price_chart
+from normalize import Normalizer, price_value, report as report_normalize
+from sitemap import SitemapWriter, MAX_URLS, INDEX_NAME as SITEMAP_INDEX
+from toolstore import FILL_VALUE, ToolStore
+from matchups import build_matchups
+from packager import GZIP_SUFFIX, Packager, PackagingLoader
+from tracing import BuildTrace, PageStats, default_report_path
+from pipeline import (
+    PageUrls, PageWriter, ToolRecord, pair_filename, plan_shards, tool_slugs,
+)
 
 # Tiandao Project Generator v8.0 (Optimized & Monetized)
 # Based on v7.1 Stable - Preserves Article Stitching Logic
 
+NON_PAGE_CONFIG_KEYS = {'build', 'index', 'sitemap', 'matchups'}
+# 对战页拼接逻辑变化时递增，让增量构建重新渲染所有页面
+RENDER_VERSION = 4
+# 输出目录里还没有时写入的占位法律页面
+LEGAL_PAGES = {
+    "privacy.html": "<h1>Privacy Policy</h1><p>We respect your privacy.</p>",
+    "terms.html": "<h1>Terms of Service</h1><p>Use at your own risk.</p>",
+}
+
 class SiteGenerator:
-    def __init__(self):
+    def __init__(self, data_path=None, output_dir=None):
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.data_path = os.path.join(self.base_dir, 'data', 'data.csv')
+        # data_path / output_dir 可覆盖（基准测试用合成数据和临时输出目录）
+        self.data_path = data_path or os.path.join(self.base_dir, 'data', 'data.csv')
         self.config_path = os.path.join(self.base_dir, 'config.json') # 新增配置路径
         self.template_dir = os.path.join(self.base_dir, 'templates')
-        self.output_dir = os.path.join(self.base_dir, 'output')
+        self.output_dir = output_dir or os.path.join(self.base_dir, 'output')
         self.static_dir = os.path.join(self.base_dir, 'static')
         self.generated_urls = []
+        self.index_urls = []
         
         # 加载配置 (新增)
         try:
@@ -26,6 +52,22 @@ class SiteGenerator:
         except Exception:
             self.config = {}
 
+        self.build_date = datetime.datetime.now().strftime("%B %Y")
+        self.fragments = None
+        self.affiliates = AffiliateResolver(self.config.get('affiliate_map', {}))
+        # 同一轮渲染的语言版本（见 locales.py），第一个总是英文
+        self.locales = resolve_locales(self.config)
+
+        # 增量构建状态：changed_tools 为 None 表示全量渲染
+        self.manifest = BuildManifest(self.output_dir)
+        self.changed_tools = None
+        # 本次构建要生成的对战 pair（见 matchups.py），generate_pages 时确定
+        self.matchups = None
+        # 阶段耗时、单页延迟和计数，构建结束后写入 build_report.json
+        self.trace = BuildTrace()
+        # 输出打包：HTML 压缩、共享 CSS 哈希化、.gz 预压缩（见 packager.py）
+        self.packager = Packager(self.output_dir, self.config.get('package', {}))
+
     def load_data(self):
         print(f"📂 Loading data from {self.data_path}...")
         if not os.path.exists(self.data_path):
@@ -33,200 +75,343 @@ class SiteGenerator:
             return []
         
         try:
-            df = pd.read_csv(self.data_path, header=0, on_bad_lines='skip', encoding='utf-8')
-            df = df[df['Tool_Name'] != 'Tool_Name']
-            df = df.fillna("Info pending")
-            # 确保 Price 也是字符串，防止报错
-            df['Price'] = df['Price'].astype(str).replace("nan", "Check Website").replace("", "Check Website")
-            return df.to_dict('records')
+            # 二进制快照（见 toolstore.py）：CSV 未变化时直接 mmap 加载已规范化的结果，
+            # 去重、价格解析和 slug 都只在 CSV 变化后做一次（见 normalize.py）
+            store = ToolStore.open(self.data_path, transform=Normalizer())
+            meta = store.meta or {}
+            report_normalize(meta)
+            self.trace.count('rows_loaded', meta.get('rows', len(store)))
+            self.trace.count('duplicates_merged', meta.get('merged', 0))
+            self.trace.count('slug_collisions', len(meta.get('collisions', ())))
+            return store.with_fill(FILL_VALUE).rows()
         except Exception as e:
             print(f"❌ CSV Error: {e}")
             return []
 
-    # 【核心新增】佣金拦截器
+    # 【核心新增】佣金拦截器（编译后的多模式匹配，见 affiliates.py）
     def get_affiliate_link(self, tool_name, original_link):
-        if not self.config or 'affiliate_map' not in self.config:
-            return original_link
-            
-        clean_name = str(tool_name).strip()
-        for key, link in self.config.get('affiliate_map', {}).items():
-            if key.lower() in clean_name.lower():
-                return link
-        return original_link
+        return self.affiliates.resolve(tool_name, original_link)
+
+    page_filename = staticmethod(pair_filename)
+
+    def prepare_tools(self, tools):
+        """每个工具只做一次链接替换和名称清洗，之后渲染阶段只读。"""
+        prepared = []
+        for tool in tools:
+            record = dict(tool)
+            # 在生成内容前，先把链接替换成高佣链接
+            record['Affiliate_Link'] = self.get_affiliate_link(record['Tool_Name'], record.get('Affiliate_Link', '#'))
+            prepared.append(ToolRecord(record))
+        self.write_affiliate_report(prepared)
+        return prepared
+
+    def write_affiliate_report(self, tools):
+        report = self.affiliates.report(tools)
+        os.makedirs(self.manifest.dir, exist_ok=True)
+        with open(os.path.join(self.manifest.dir, 'affiliates.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        hits = sum(len(names) for names in report['matched'].values())
+        print(f"💰 Affiliate links: {hits} tools matched {len(report['matched'])} partners.")
+
+    @staticmethod
+    def tool_names(tools):
+        return [str(t.get('Tool_Name', 'Unknown')).strip() for t in tools]
+
+    def build_fingerprint(self):
+        """模板、配置或日期变化时，所有页面都需要重新渲染。"""
+        parts = [
+            str(RENDER_VERSION),
+            hash_file(os.path.join(self.template_dir, 'page.html')),
+            # 只影响构建方式或索引/sitemap 的配置不会改变对战页内容
+            hash_text(json.dumps({k: v for k, v in self.config.items() if k not in NON_PAGE_CONFIG_KEYS}, sort_keys=True)),
+            self.build_date,
+        ]
+        return hash_text("|".join(parts))
+
+    def prepare_build(self, tools, incremental=True):
+        """对比 manifest，确定本次需要重新渲染的工具集合。"""
+        tool_hashes = compute_tool_hashes(tools)
+        fingerprint = self.build_fingerprint()
+
+        if incremental and self.manifest.load() and self.manifest.globals_hash == fingerprint:
+            changed, removed = diff_tools(self.manifest.tools, tool_hashes)
+            self.changed_tools = changed
+            print(f"♻️  Incremental build: {len(changed)} changed, {len(removed)} removed tools.")
+        else:
+            if incremental and self.manifest.tools:
+                print("♻️  Templates or config changed. Rebuilding every page.")
+            self.changed_tools = None
+
+        self.manifest.globals_hash = fingerprint
+        self.manifest.tools = tool_hashes
+
+    def is_page_current(self, filename, name_a, name_b, previous_digest):
+        if self.changed_tools is None or previous_digest is None:
+            return False
+        if name_a in self.changed_tools or name_b in self.changed_tools:
+            return False
+        return os.path.exists(os.path.join(self.output_dir, filename))
+
+    def write_if_changed(self, filename, content, previous_digest=None):
+        """内容未变化时不写文件，保持部署 diff 最小。返回新摘要。"""
+        path = os.path.join(self.output_dir, filename)
+        packed = self.packager.package(filename, content)
+        digest = hash_text(packed)
+        if previous_digest is None and os.path.exists(path):
+            previous_digest = hash_file(path)
+        if digest != previous_digest or self.packager.missing(path):
+            original = len(content.encode('utf-8')) if packed is not content else None
+            self.packager.write(path, packed, self.trace.pages, original)
+        return digest
+
+    def load_page_template(self, locale=None):
+        # 编译后的模板字节码缓存在 manifest 目录中，跨构建复用
+        locale = locale or self.locales[0]
+        bytecode_dir = os.path.join(self.manifest.dir, 'jinja')
+        os.makedirs(bytecode_dir, exist_ok=True)
+        env = Environment(
+            loader=PackagingLoader(self.template_dir, self.packager),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+        )
+        # 每个语言一个 Environment：界面文案作为全局变量编进模板
+        env.globals.update(t=locale.strings, lang=locale.code, root=locale.root)
+        return env.get_template('page.html')
+
+    def load_page_templates(self):
+        return {locale.code: self.load_page_template(locale) for locale in self.locales}
+
+    def alternates(self, filename):
+        """hreflang 备用链接；只有一个语言时不输出。"""
+        if len(self.locales) < 2:
+            return []
+        links = [(locale.code, f"{self.base_url}/{locale.path(filename)}") for locale in self.locales]
+        return links + [('x-default', f"{self.base_url}/{filename}")]
+
+    def render_pair(self, template, tool_a, tool_b, frag_a=None, frag_b=None, locale=None, filename=None):
+        locale = locale or self.locales[0]
+        strings = locale.strings
+        a = frag_a or ToolFragments(tool_a, price_value(tool_a), strings)
+        b = frag_b or ToolFragments(tool_b, price_value(tool_b), strings)
+        name_a, name_b = a.name, b.name
+        chart = ""
+        if self.config.get('charts', {}).get('enabled', True):
+            chart = render_price_chart(
+                name_a, a.price_value, name_b, b.price_value, strings['chart_title'], strings['chart_caption'],
+            )
+
+        # 3. 生成长文内容 (完整保留您原有的拼接逻辑，各语言的拼接模板见 locales.py)
+        article_body = strings['article'].format(name_a=name_a, name_b=name_b, a=a, b=b, chart=chart)
+
+        render_data = {
+            'tool_a': tool_a,
+            'tool_b': tool_b,
+            'title': strings['title'].format(name_a=name_a, name_b=name_b), # 优化了标题
+            'meta_description': strings['meta_description'].format(name_a=name_a, name_b=name_b, summary=a.summary),
+            'article_body': article_body,
+            'date': self.build_date,
+            'updated': locale.format_date(self.build_date),
+            'alternates': self.alternates(filename or self.page_filename(name_a, name_b)),
+            'config': self.config # 传入配置供模板使用
+        }
+        return template.render(**render_data)
+
+    def render_shard(self, templates, tools, rows, graph):
+        """渲染 rows 中每个工具作为左侧 (tool_a) 的所有对战页，每个 pair 一次产出全部语言版本。
+
+        templates 为 load_page_templates() 的 {语言: 模板}。
+        返回 (updates, kept, failed, rendered, stats)：updates 为需要写入 manifest 的
+        (filename, tool_a, tool_b, digest)，kept 为沿用上次结果的文件名，
+        stats 为本分片的 PageStats（渲染/写盘延迟）。
+        """
+        names, slugs = self.tool_names(tools), graph.slugs
+        updates, kept, failed = [], [], []
+        stats = PageStats()
+        writer = PageWriter(self.output_dir, stats=stats, packager=self.packager)
+
+        # graph 只产出需要生成的 pair；同名工具映射到同一个文件时只产出负责写入的那一对
+        localized = [(locale, templates[locale.code], self.fragments.locale(locale.code)) for locale in self.locales]
+        for i, j in graph.pairs(rows):
+            name_a, name_b = names[i], names[j]
+            page = self.page_filename(slugs[i], slugs[j])
+
+            for locale, template, (records, fragments) in localized:
+                filename = locale.path(page)
+                # 增量模式：两个工具都没变化且文件仍在，直接沿用
+                previous_digest = self.manifest.get_digest(filename)
+                if self.is_page_current(filename, name_a, name_b, previous_digest):
+                    kept.append(filename)
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    content = self.render_pair(
+                        template, records[i], records[j], fragments[i], fragments[j], locale, page,
+                    )
+                except Exception as e:
+                    print(f"⚠️ Error generating {filename}: {e}")
+                    failed.append(filename)
+                    continue
+                elapsed = time.perf_counter() - started
+                stats.render.add(elapsed)
+                stats.slowest.add(elapsed, filename)
+
+                digest = self.packager.digest(content)
+                if digest != previous_digest or self.packager.missing(os.path.join(self.output_dir, filename)):
+                    writer.write(filename, content)
+                updates.append((filename, name_a, name_b, digest))
+
+        write_failed = set(writer.close())
+        if write_failed:
+            updates = [u for u in updates if u[0] not in write_failed]
+            failed.extend(write_failed)
+        return updates, kept, failed, len(updates), stats
 
     def generate_pages(self, tools):
-        env = Environment(loader=FileSystemLoader(self.template_dir))
         try:
-            template = env.get_template('page.html')
+            templates = self.load_page_templates()
         except Exception as e:
             print(f"❌ Template Error: {e}")
             return
 
-        pairs = list(combinations(tools, 2))
-        print(f"⚔️  Generating {len(pairs)} battle pages...")
+        names = self.tool_names(tools)
+        graph = self.matchups = build_matchups(names, tools, self.config, self.base_dir, tool_slugs(tools))
+        print(f"⚔️  Generating battle pages: {graph.describe()}...")
+        # 每个工具每个语言的可复用片段只格式化一次，随 generator 一起交给 worker
+        self.fragments = FragmentCache(tools, self.locales)
+        for locale in self.locales:
+            if locale.prefix:
+                os.makedirs(os.path.join(self.output_dir, locale.prefix), exist_ok=True)
+        workers = resolve_workers(self.config)
+        self.manifest.begin_build()
+        failed = set()
+        rendered = kept = 0
 
-        for tool_a, tool_b in pairs:
-            # 1. 在生成内容前，先把链接替换成高佣链接 (新增逻辑)
-            tool_a['Affiliate_Link'] = self.get_affiliate_link(tool_a['Tool_Name'], tool_a.get('Affiliate_Link', '#'))
-            tool_b['Affiliate_Link'] = self.get_affiliate_link(tool_b['Tool_Name'], tool_b.get('Affiliate_Link', '#'))
+        start = time.perf_counter()
+        if workers > 1:
+            results = render_parallel(self, tools, graph, workers)
+        else:
+            shards = plan_shards(len(tools), pair_count=graph.pair_count)
+            results = (self.render_shard(templates, tools, shard, graph) for shard in shards)
+        # 每个分片的结果处理完即丢弃，内存不随 pair 数增长
+        for updates, shard_kept, shard_failed, shard_rendered, shard_stats in results:
+            self.manifest.put_pages(updates)
+            self.manifest.touch_pages(shard_kept)
+            failed.update(shard_failed)
+            rendered += shard_rendered
+            kept += len(shard_kept)
+            self.trace.pages.merge(shard_stats)
+        elapsed = time.perf_counter() - start
 
-            # 2. 生成 Slug
-            name_a = str(tool_a.get('Tool_Name', 'Unknown')).strip()
-            name_b = str(tool_b.get('Tool_Name', 'Unknown')).strip()
-            slug = f"{name_a.lower()}-vs-{name_b.lower()}".replace(" ", "-").replace(".", "")
-            filename = f"{slug}.html"
-            
-            # 3. 生成长文内容 (完整保留您原有的拼接逻辑)
-            article_body = f"""
-            <div class="battle-section">
-                <h2>The Ultimate Showdown: {name_a} vs {name_b}</h2>
-                <p>In the competitive world of SEO tools, deciding between <strong>{name_a}</strong> and <strong>{name_b}</strong> is a common dilemma. Both platforms offer powerful features, but they cater to different needs.</p>
-                
-                <h3>1. Deep Dive: {name_a}</h3>
-                <p>{tool_a.get('Long_Review', 'Review pending...')}</p>
-                <div class="verdict-box"><strong>Verdict:</strong> {tool_a.get('Verdict', '')}</div>
-                
-                <h3>2. Deep Dive: {name_b}</h3>
-                <p>{tool_b.get('Long_Review', 'Review pending...')}</p>
-                <div class="verdict-box"><strong>Verdict:</strong> {tool_b.get('Verdict', '')}</div>
-                
-                <h3>3. Feature & Price Comparison</h3>
-                <p>{name_a} enters the ring at {tool_a.get('Price', 'N/A')}, while {name_b} costs {tool_b.get('Price', 'N/A')}. 
-                If budget is your primary concern, check the pricing details above carefully.</p>
-                
-                <h3>4. Final Recommendation</h3>
-                <p>If you need <strong>{str(tool_a.get('Pros', '')).split(';')[0]}</strong>, then {name_a} is likely your best choice.</p>
-                <p>However, for those prioritizing <strong>{str(tool_b.get('Pros', '')).split(';')[0]}</strong>, {name_b} stands out as the winner.</p>
-            </div>
-            """
-
-            render_data = {
-                'tool_a': tool_a,
-                'tool_b': tool_b,
-                'title': f"{name_a} vs {name_b}: Which is Better in 2026? (Honest Review)", # 优化了标题
-                'meta_description': f"Unbiased comparison of {name_a} vs {name_b}. {str(tool_a.get('Description', ''))[:100]}...",
-                'article_body': article_body,
-                'date': datetime.datetime.now().strftime("%B %Y"),
-                'config': self.config # 传入配置供模板使用
-            }
+        # 删除已不存在的对战页（工具被移除或改名）
+        stale = self.manifest.sweep_pages()
+        for filename in stale:
+            path = os.path.join(self.output_dir, filename)
+            for stale_path in (path, path + GZIP_SUFFIX):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
 
-            try:
-                content = template.render(**render_data)
-                with open(os.path.join(self.output_dir, filename), 'w', encoding='utf-8') as f:
-                    f.write(content)
-                self.generated_urls.append(filename)
-            except Exception as e:
-                print(f"⚠️ Error generating {filename}: {e}")
+        self.generated_urls = PageUrls(graph, failed)
+        self.trace.count('pages_rendered', rendered)
+        self.trace.count('pages_reused', kept)
+        self.trace.count('pages_removed', len(stale))
+        self.trace.count('pages_failed', len(failed))
+        rate = rendered / elapsed if elapsed > 0 else 0
+        print(f"   Rendered {rendered} ({rate:.0f} pages/sec), reused {kept}, removed {len(stale)} pages.")
 
     def generate_index(self, tools):
-        print("🏠 Generating Professional Index Page...")
-        pairs = list(combinations(tools, 2))
-        
-        # 首页逻辑保持不变，确保首页也使用 favicon
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>SaaS Battle Arena - Top 2026 Software Comparisons</title>
-            <link rel="icon" href="/static/favicon.png" type="image/png">
-            <meta name="description" content="Unbiased AI-driven comparisons of top B2B SaaS tools. Find the best software for your business.">
-            <style>
-                body {{ background: #0f172a; color: #f1f5f9; font-family: system-ui, sans-serif; padding: 40px 20px; margin: 0; }}
-                .container {{ max-width: 1200px; margin: 0 auto; }}
-                h1 {{ text-align: center; font-size: 2.5rem; margin-bottom: 10px; color: #3b82f6; }}
-                .subtitle {{ text-align: center; color: #94a3b8; margin-bottom: 60px; font-size: 1.1rem; }}
-                .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(280px, 1fr)); gap: 20px; }}
-                .card {{ background: #1e293b; padding: 20px; border-radius: 12px; border: 1px solid #334155; transition: 0.2s; text-align: center; text-decoration: none; display: block; }}
-                .card:hover {{ transform: translateY(-5px); border-color: #3b82f6; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }}
-                .card-title {{ color: #38bdf8; font-weight: bold; font-size: 1.1rem; margin-bottom: 5px; }}
-                .vs-tag {{ color: #64748b; font-size: 0.85rem; text-transform: uppercase; letter-spacing: 0.05em; }}
-                footer {{ text-align: center; margin-top: 80px; color: #475569; border-top: 1px solid #1e293b; padding-top: 40px; }}
-                footer a {{ color: #64748b; text-decoration: none; margin: 0 10px; transition: color 0.2s; }}
-                footer a:hover {{ color: #38bdf8; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>⚔️ SaaS Battle Arena</h1>
-                <p class="subtitle">Unbiased, AI-driven comparisons of {len(tools)} top SEO tools. {len(pairs)} battles generated.</p>
-                <div class="grid">
-                    {''.join([f'''
-                    <a href="{str(t[0].get("Tool_Name")).strip().lower().replace(" ", "-").replace(".", "")}-vs-{str(t[1].get("Tool_Name")).strip().lower().replace(" ", "-").replace(".", "")}.html" class="card">
-                        <div class="vs-tag">Comparison</div>
-                        <div class="card-title">
-                            {t[0].get("Tool_Name")} <span style="color:#94a3b8">vs</span> {t[1].get("Tool_Name")}
-                        </div>
-                    </a>
-                    ''' for t in pairs])}
-                </div>
-                <footer>
-                    <p>&copy; 2026 SaaS Battle Arena.</p>
-                    <div style="margin: 20px auto; max-width: 800px; font-size: 0.8rem; color: #64748b; line-height: 1.5; opacity: 0.8;">
-                        {self.config.get('legal', {}).get('disclosure', 'Advertiser Disclosure: We may receive compensation if you click on links. This supports our research.')}
-                    </div>
-                    <p><a href="privacy.html">Privacy</a> | <a href="terms.html">Terms</a></p>
-                </footer>
-            </div>
-        </body>
-        </html>
-        """
-        with open(os.path.join(self.output_dir, "index.html"), 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        print("🏠 Generating Paginated Index & Tool Hubs...")
+        failed = getattr(self.generated_urls, 'failed', set())
+        self.index_urls = SiteIndexer(self).build(tools, failed)
+
+    @property
+    def base_url(self):
+        return self.config.get('domain', 'https://compare.ii-x.com').rstrip('/')
+
+    def file_mtime(self, filename):
+        try:
+            return os.path.getmtime(os.path.join(self.output_dir, filename))
+        except OSError:
+            return None
 
     def generate_sitemap(self):
         print("🗺️  Generating Sitemap...")
-        base_url = "https://compare.ii-x.com"
-        xml = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        xml += f'<url><loc>{base_url}/</loc><priority>1.0</priority></url>\n'
+        options = self.config.get('sitemap', {})
+        writer = SitemapWriter(
+            self.output_dir, self.base_url,
+            use_gzip=options.get('gzip', False),
+            max_urls=int(options.get('max_urls', MAX_URLS)),
+        )
+        writer.add("", self.file_mtime("index.html"), "1.0")
+        for url in self.index_urls:
+            writer.add(url, self.file_mtime(url), "0.9")
+        # lastmod 优先取 manifest 中记录的内容变化时间
         for url in self.generated_urls:
-            xml += f'<url><loc>{base_url}/{url}</loc><priority>0.8</priority></url>\n'
-        xml += '</urlset>'
-        with open(os.path.join(self.output_dir, "sitemap.xml"), 'w', encoding='utf-8') as f:
-            f.write(xml)
+            lastmod = self.manifest.get_lastmod(url) or self.file_mtime(url)
+            writer.add(url, lastmod, "0.8")
+        # 其他语言的对战页各自一组分片：sitemap-es-001.xml ...
+        failed = getattr(self.generated_urls, 'failed', set())
+        for locale in self.locales[1:]:
+            writer.begin_section(locale.code)
+            for url in self.generated_urls:
+                path = locale.path(url)
+                if path not in failed:
+                    writer.add(path, self.manifest.get_lastmod(path) or self.file_mtime(path), "0.8")
+        self.write_if_changed(SITEMAP_INDEX, writer.close())
+        print(f"   {writer.total} URLs in {len(writer.shards)} sitemap shards.")
 
     def generate_robots(self):
-        with open(os.path.join(self.output_dir, "robots.txt"), 'w', encoding='utf-8') as f:
-            f.write("User-agent: *\nAllow: /\nSitemap: https://compare.ii-x.com/sitemap.xml")
+        self.write_if_changed("robots.txt", f"User-agent: *\nAllow: /\nSitemap: {self.base_url}/{SITEMAP_INDEX}")
 
     def copy_assets(self):
         if os.path.exists(self.static_dir):
             try:
+                # 只复制内容变化的文件，不再每次整目录删除重建
                 output_static = os.path.join(self.output_dir, 'static')
-                if os.path.exists(output_static):
-                    shutil.rmtree(output_static)
-                shutil.copytree(self.static_dir, output_static)
-                print("🎨 Assets copied.")
+                copied, unchanged, removed = self.packager.sync_assets(self.static_dir, output_static)
+                print(f"🎨 Assets: {copied} copied, {unchanged} unchanged, {removed} removed.")
             except Exception as e:
                 print(f"⚠️ Asset copy failed: {e}")
+        # 删除本次构建不再引用的哈希样式表
+        self.packager.sweep()
                 
-        privacy_path = os.path.join(self.output_dir, "privacy.html")
-        if not os.path.exists(privacy_path):
-            with open(privacy_path, 'w', encoding='utf-8') as f:
-                f.write("<h1>Privacy Policy</h1><p>We respect your privacy.</p>")
-                
-        terms_path = os.path.join(self.output_dir, "terms.html")
-        if not os.path.exists(terms_path):
-            with open(terms_path, 'w', encoding='utf-8') as f:
-                f.write("<h1>Terms of Service</h1><p>Use at your own risk.</p>")
+        for filename, content in LEGAL_PAGES.items():
+            path = os.path.join(self.output_dir, filename)
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
 
-    def run(self):
+    def run(self, incremental=None, report_path=None):
         print("🚀 Starting Generator v8.0...")
-        if os.path.exists(self.output_dir):
+        if incremental is None:
+            incremental = self.config.get('build', {}).get('incremental', True)
+        if not incremental and os.path.exists(self.output_dir):
             shutil.rmtree(self.output_dir)
-        os.makedirs(self.output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
             
-        tools = self.load_data()
+        trace = self.trace
+        with trace.stage('load_data'):
+            tools = self.load_data()
         if not tools:
             print("❌ No tools loaded. Aborting.")
             return
 
-        self.generate_pages(tools)
-        self.generate_index(tools)
-        self.generate_sitemap()
-        self.generate_robots()
-        self.copy_assets()
+        with trace.stage('prepare'):
+            self.prepare_build(tools, incremental)
+            tools = self.prepare_tools(tools)
+        with trace.stage('generate_pages'):
+            self.generate_pages(tools)
+        with trace.stage('generate_index'):
+            self.generate_index(tools)
+        with trace.stage('generate_sitemap'):
+            self.generate_sitemap()
+            self.generate_robots()
+        with trace.stage('copy_assets'):
+            self.copy_assets()
+        self.manifest.save()
+        self.manifest.close()
+        trace.count('tools', len(tools))
+        trace.summary()
+        trace.write(report_path or default_report_path(self.output_dir))
         print("✅ Generation Complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import html
+
+from pipeline import tool_slugs
+from matchups import AllPairs
+from packager import GZIP_SUFFIX
+
+# Tiandao Index Builder v1.0
+# 分页首页 + 每个工具一个 Hub 页 + 分块 JSON 搜索索引
+# 每个页面的卡片数都有上限，目录再大单页体积也保持不变
+
+HUB_DIR = 'tools'
+SEARCH_DIR = 'search'
+INDEX_PAGE_RE = re.compile(r'^index-\d+\.html$')
+
+INDEX_STYLE = """
+    body { background: #0f172a; color: #f1f5f9; font-family: system-ui, sans-serif; padding: 40px 20px; margin: 0; }
+    .container { max-width: 1200px; margin: 0 auto; }
+    h1 { text-align: center; font-size: 2.5rem; margin-bottom: 10px; color: #3b82f6; }
+    .subtitle { text-align: center; color: #94a3b8; margin-bottom: 40px; font-size: 1.1rem; }
+    .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(280px, 1fr)); gap: 20px; }
+    .card { background: #1e293b; padding: 20px; border-radius: 12px; border: 1px solid #334155; transition: 0.2s; text-align: center; text-decoration: none; display: block; }
+    .card:hover { transform: translateY(-5px); border-color: #3b82f6; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }
+    .card-title { color: #38bdf8; font-weight: bold; font-size: 1.1rem; margin-bottom: 5px; }
+    .vs-tag { color: #64748b; font-size: 0.85rem; text-transform: uppercase; letter-spacing: 0.05em; }
+    .search { display: block; width: 100%; max-width: 600px; margin: 0 auto 40px; padding: 14px 20px; border-radius: 50px; border: 1px solid #334155; background: #1e293b; color: #f1f5f9; font-size: 1rem; box-sizing: border-box; }
+    #results { max-width: 600px; margin: -30px auto 40px; }
+    #results a { display: block; padding: 10px 20px; color: #38bdf8; text-decoration: none; border-bottom: 1px solid #1e293b; }
+    .pager { display: flex; justify-content: center; flex-wrap: wrap; gap: 8px; margin-top: 40px; }
+    .pager a, .pager span { padding: 8px 14px; border-radius: 8px; border: 1px solid #334155; color: #94a3b8; text-decoration: none; }
+    .pager .current { background: #3b82f6; color: white; border-color: #3b82f6; }
+    footer { text-align: center; margin-top: 80px; color: #475569; border-top: 1px solid #1e293b; padding-top: 40px; }
+    footer a { color: #64748b; text-decoration: none; margin: 0 10px; transition: color 0.2s; }
+    footer a:hover { color: #38bdf8; }
+"""
+
+# 搜索框获得焦点时才按需拉取 JSON 分块
+SEARCH_SCRIPT = """
+<script>
+(function () {
+    var box = document.getElementById('search'), out = document.getElementById('results');
+    var base = box.getAttribute('data-base'), entries = [], meta = null, loaded = 0, loading = null;
+    function loadNext() {
+        if (meta && loaded >= meta.chunks) return Promise.resolve();
+        var metaReq = meta ? Promise.resolve(meta) : fetch(base + 'meta.json').then(function (r) { return r.json(); });
+        return metaReq.then(function (m) {
+            meta = m;
+            if (loaded >= meta.chunks) return;
+            var name = base + 'chunk-' + String(loaded).padStart(3, '0') + '.json';
+            return fetch(name).then(function (r) { return r.json(); }).then(function (rows) {
+                entries = entries.concat(rows); loaded += 1;
+            });
+        });
+    }
+    function show() {
+        var q = box.value.trim().toLowerCase();
+        out.innerHTML = '';
+        if (!q) return;
+        var hits = entries.filter(function (e) { return e[0].toLowerCase().indexOf(q) !== -1; }).slice(0, 20);
+        hits.forEach(function (e) {
+            var a = document.createElement('a');
+            a.href = e[1]; a.textContent = e[0] + ' (' + e[2] + ' matchups)';
+            out.appendChild(a);
+        });
+        if (hits.length < 20 && meta && loaded < meta.chunks && !loading) {
+            loading = loadNext().then(function () { loading = null; show(); });
+        }
+    }
+    box.addEventListener('focus', function () { if (!meta) loadNext().then(show); });
+    box.addEventListener('input', show);
+})();
+</script>
+"""
+
+
+def hub_filename(key, page=1):
+    suffix = "" if page == 1 else f"-{page}"
+    return f"{HUB_DIR}/{key}{suffix}.html"
+
+
+def index_filename(page=1):
+    return "index.html" if page == 1 else f"index-{page}.html"
+
+
+def paginate(items, size):
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)] or [[]]
+
+
+class SiteIndexer:
+    def __init__(self, generator):
+        self.generator = generator
+        self.config = generator.config
+        options = self.config.get('index', {})
+        self.page_size = int(options.get('page_size', 120))
+        self.hub_page_size = int(options.get('hub_page_size', 200))
+        self.chunk_size = int(options.get('search_chunk_size', 500))
+        self.urls = []
+
+    def build(self, tools, failed=None):
+        """生成全部索引页，返回新生成页面的相对 URL（供 sitemap 使用）。"""
+        names = self.generator.tool_names(tools)
+        # 只列出本次构建实际生成的对战（见 matchups.py）
+        slugs = tool_slugs(tools)
+        graph = self.generator.matchups or AllPairs(names, slugs)
+        hubs = self.group_hubs(names, slugs)
+        failed = failed or set()
+
+        for sub in (HUB_DIR, SEARCH_DIR):
+            os.makedirs(os.path.join(self.generator.output_dir, sub), exist_ok=True)
+
+        counts = {}
+        hub_files = set()
+        for key, (name, _) in hubs.items():
+            matchups = graph.matchups_for(key, failed)
+            counts[key] = len(matchups)
+            hub_files.update(self.write_hub(key, name, matchups))
+
+        index_files = self.write_index_pages(hubs, counts, len(tools))
+        search_files = self.write_search_index(hubs, counts)
+
+        self.sweep(HUB_DIR, hub_files)
+        self.sweep(SEARCH_DIR, search_files)
+        self.sweep("", index_files, pattern=INDEX_PAGE_RE)
+        print(f"   {len(index_files)} index pages, {len(hub_files)} hub pages, {len(search_files) - 1} search chunks.")
+        return self.urls
+
+    @staticmethod
+    def group_hubs(names, slugs):
+        """按 slug 聚合同名工具，保持首次出现的顺序。"""
+        hubs = {}
+        for idx, (name, key) in enumerate(zip(names, slugs)):
+            if key not in hubs:
+                hubs[key] = (name, [])
+            hubs[key][1].append(idx)
+        return hubs
+
+    def write_hub(self, key, name, matchups):
+        pages = paginate(matchups, self.hub_page_size)
+        written = set()
+        for page_no, chunk in enumerate(pages, start=1):
+            cards = ''.join(f'''
+                    <a href="../{filename}" class="card">
+                        <div class="vs-tag">Comparison</div>
+                        <div class="card-title">
+                            {html.escape(name)} <span style="color:#94a3b8">vs</span> {html.escape(other)}
+                        </div>
+                    </a>''' for filename, other in chunk)
+            body = f'''
+                <h1>{html.escape(name)} Alternatives</h1>
+                <p class="subtitle">{len(matchups)} head-to-head comparisons featuring {html.escape(name)}.</p>
+                <div class="grid">{cards}
+                </div>
+                {self.pager(len(pages), page_no, lambda n: os.path.basename(hub_filename(key, n)))}'''
+            filename = hub_filename(key, page_no)
+            content = self.shell(
+                f"{name} Alternatives & Comparisons (2026) - SaaS Battle Arena",
+                f"Compare {name} against {len(matchups)} competing tools side by side.",
+                body, root="../",
+            )
+            self.generator.write_if_changed(filename, content)
+            self.urls.append(filename)
+            written.add(os.path.basename(filename))
+        return written
+
+    def write_index_pages(self, hubs, counts, tool_count):
+        entries = [(key, name) for key, (name, _) in hubs.items()]
+        pages = paginate(entries, self.page_size)
+        total_battles = sum(counts.values()) // 2
+        written = set()
+        for page_no, chunk in enumerate(pages, start=1):
+            cards = ''.join(f'''
+                    <a href="{hub_filename(key)}" class="card">
+                        <div class="vs-tag">{counts[key]} matchups</div>
+                        <div class="card-title">{html.escape(name)}</div>
+                    </a>''' for key, name in chunk)
+            body = f'''
+                <h1>⚔️ SaaS Battle Arena</h1>
+                <p class="subtitle">Unbiased, AI-driven comparisons of {tool_count} top SEO tools. {total_battles} battles generated.</p>
+                <input id="search" class="search" type="search" placeholder="Search a tool..." data-base="{SEARCH_DIR}/" autocomplete="off">
+                <div id="results"></div>
+                <div class="grid">{cards}
+                </div>
+                {self.pager(len(pages), page_no, index_filename)}'''
+            filename = index_filename(page_no)
+            title = "SaaS Battle Arena - Top 2026 Software Comparisons"
+            if page_no > 1:
+                title += f" (Page {page_no})"
+            content = self.shell(
+                title,
+                "Unbiased AI-driven comparisons of top B2B SaaS tools. Find the best software for your business.",
+                body + SEARCH_SCRIPT,
+            )
+            self.generator.write_if_changed(filename, content)
+            if page_no > 1:
+                self.urls.append(filename)
+            written.add(filename)
+        return written
+
+    def write_search_index(self, hubs, counts):
+        entries = [[name, hub_filename(key), counts[key]] for key, (name, _) in hubs.items()]
+        chunks = paginate(entries, self.chunk_size)
+        written = set()
+        for idx, chunk in enumerate(chunks):
+            filename = f"chunk-{idx:03d}.json"
+            self.generator.write_if_changed(
+                f"{SEARCH_DIR}/{filename}", json.dumps(chunk, ensure_ascii=False, separators=(',', ':'))
+            )
+            written.add(filename)
+        meta = {'count': len(entries), 'chunks': len(chunks), 'chunk_size': self.chunk_size}
+        self.generator.write_if_changed(f"{SEARCH_DIR}/meta.json", json.dumps(meta))
+        written.add("meta.json")
+        return written
+
+    @staticmethod
+    def pager(page_count, current, link):
+        if page_count <= 1:
+            return ""
+        # 只显示当前页附近的页码，保证翻页条长度固定
+        shown = sorted({1, page_count} | set(range(max(1, current - 3), min(page_count, current + 3) + 1)))
+        parts = []
+        if current > 1:
+            parts.append(f'<a href="{link(current - 1)}">&larr; Prev</a>')
+        for n in shown:
+            if n == current:
+                parts.append(f'<span class="current">{n}</span>')
+            else:
+                parts.append(f'<a href="{link(n)}">{n}</a>')
+        if current < page_count:
+            parts.append(f'<a href="{link(current + 1)}">Next &rarr;</a>')
+        return f'<nav class="pager">{"".join(parts)}</nav>'
+
+    def shell(self, title, description, body, root=""):
+        disclosure = self.config.get('legal', {}).get(
+            'disclosure', 'Advertiser Disclosure: We may receive compensation if you click on links. This supports our research.'
+        )
+        return f"""
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>{html.escape(title)}</title>
+            <link rel="icon" href="/static/favicon.png" type="image/png">
+            <meta name="description" content="{html.escape(description)}">
+            <style>{INDEX_STYLE}</style>
+        </head>
+        <body>
+            <div class="container">{body}
+                <footer>
+                    <p>&copy; 2026 SaaS Battle Arena.</p>
+                    <div style="margin: 20px auto; max-width: 800px; font-size: 0.8rem; color: #64748b; line-height: 1.5; opacity: 0.8;">
+                        {disclosure}
+                    </div>
+                    <p><a href="{root}index.html">Home</a> | <a href="{root}privacy.html">Privacy</a> | <a href="{root}terms.html">Terms</a></p>
+                </footer>
+            </div>
+        </body>
+        </html>
+        """
+
+    def sweep(self, sub, keep, pattern=None):
+        """删除上次构建留下、本次已不存在的索引文件。"""
+        folder = os.path.join(self.generator.output_dir, sub)
+        if not os.path.isdir(folder):
+            return
+        for filename in os.listdir(folder):
+            # .gz 兄弟文件跟随原文件一起保留或删除
+            base = filename[:-len(GZIP_SUFFIX)] if filename.endswith(GZIP_SUFFIX) else filename
+            if base in keep or (pattern and not pattern.match(base)):
+                continue
+            path = os.path.join(folder, filename)
+            if os.path.isfile(path):
+                os.remove(path)
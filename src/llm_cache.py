@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+
+# Tiandao LLM Response Cache
+# 以 (model, prompt, temperature) 的哈希为键，把原始回复和解析结果存进本地 SQLite
+# 支持 TTL 过期和按体积的 LRU 淘汰；解析失败的回复也会保留，避免重复付费
+
+JSON_BLOCK_RE = re.compile(r'\{.*\}', re.S)
+
+
+def cache_key(model, prompt, temperature):
+    payload = json.dumps([model, prompt, float(temperature)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def salvage_json(raw):
+    """尽量从原始回复中解析出 JSON（去掉 markdown 围栏、截取最外层大括号）。"""
+    if raw is None:
+        return None
+    content = raw.strip().replace("```json", "").replace("```", "")
+    try:
+        return json.loads(content)
+    except ValueError:
+        pass
+    match = JSON_BLOCK_RE.search(content)
+    if match:
+        try:
+            return json.loads(match.group(0))
+        except ValueError:
+            pass
+    return None
+
+
+class ResponseCache:
+    def __init__(self, path, ttl=None, max_bytes=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, temperature REAL, tool_name TEXT, prompt TEXT, "
+            "raw TEXT, parsed TEXT, created REAL, accessed REAL, size INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_tool ON responses (tool_name)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _expired(self, created):
+        return self.ttl is not None and created < time.time() - self.ttl
+
+    def get(self, model, prompt, temperature):
+        """返回 (raw, parsed)；parsed 为 None 表示上次解析失败。未命中返回 None。"""
+        key = cache_key(model, prompt, temperature)
+        row = self.conn.execute(
+            "SELECT raw, parsed, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or self._expired(row[2]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        raw, parsed, _ = row
+        return raw, (json.loads(parsed) if parsed is not None else None)
+
+    def put(self, model, prompt, temperature, raw, parsed=None, tool_name=None):
+        now = time.time()
+        parsed_text = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        size = len(prompt) + len(raw or "") + len(parsed_text or "")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, model, temperature, tool_name, prompt, raw, parsed, created, accessed, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (cache_key(model, prompt, temperature), model, float(temperature), tool_name, prompt,
+             raw, parsed_text, now, now, size),
+        )
+        self.conn.commit()
+
+    def evict(self):
+        """先删过期条目，再按最近访问时间淘汰，直到总体积低于 max_bytes。返回删除条数。"""
+        removed = 0
+        if self.ttl is not None:
+            removed += self.conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            ).rowcount
+        if self.max_bytes is not None:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+        self.conn.commit()
+        return removed
+
+    def stats(self):
+        count, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,194 @@
+from pipeline import ToolRecord
+from toolstore import FILL_VALUE, is_missing
+
+# Tiandao Locales
+# 对战页的多语言版本：英文在站点根目录，其他语言在 /<code>/ 下。
+# 工具字段取 enricher 生成的 <字段>_<CODE> 列（Pros_ES、Verdict_PT...），缺失时回退英文；
+# 页面文案（标题、正文拼接模板、按钮等）在 STRINGS 中，每个语言编译一份模板（见 generator.load_page_templates）
+
+DEFAULT_LOCALE = 'en'
+# enricher 会翻译的字段（见 enricher.ENRICH_COLUMNS）
+LOCALIZED_FIELDS = ('Pros', 'Cons', 'Verdict')
+MONTHS_EN = ('January', 'February', 'March', 'April', 'May', 'June',
+             'July', 'August', 'September', 'October', 'November', 'December')
+
+STRINGS = {
+    'en': {
+        'title': "{name_a} vs {name_b}: Which is Better in 2026? (Honest Review)",
+        'meta_description': "Unbiased comparison of {name_a} vs {name_b}. {summary}...",
+        # 原有的英文长文拼接逻辑，完整保留
+        'article': """
+            <div class="battle-section">
+                <h2>The Ultimate Showdown: {name_a} vs {name_b}</h2>
+                <p>In the competitive world of SEO tools, deciding between <strong>{name_a}</strong> and <strong>{name_b}</strong> is a common dilemma. Both platforms offer powerful features, but they cater to different needs.</p>
+
+                <h3>1. Deep Dive: {name_a}</h3>
+                {a.deep_dive}
+
+                <h3>2. Deep Dive: {name_b}</h3>
+                {b.deep_dive}
+
+                <h3>3. Feature & Price Comparison</h3>
+                <p>{name_a} enters the ring at {a.price}, while {name_b} costs {b.price}.
+                If budget is your primary concern, check the pricing details above carefully.</p>
+                {chart}
+
+                <h3>4. Final Recommendation</h3>
+                <p>If you need <strong>{a.top_pro}</strong>, then {name_a} is likely your best choice.</p>
+                <p>However, for those prioritizing <strong>{b.top_pro}</strong>, {name_b} stands out as the winner.</p>
+            </div>
+            """,
+        'verdict_label': "Verdict:",
+        'review_pending': "Review pending...",
+        'chart_title': "Monthly Price Comparison",
+        'chart_caption': "Monthly price",
+        'updated': "{date} Update",
+        'months': MONTHS_EN,
+        'claim_now': "Claim Now &rarr;",
+        'all_comparisons': "← All Comparisons",
+        'headline': "Which tool wins the SEO battle in 2026?",
+        'check_price': "Check Price",
+        'privacy': "Privacy Policy",
+        'terms': "Terms of Service",
+        'popup_title': "Wait! Don't Miss Out",
+        'popup_text': "We've found a special deal for you.",
+        'popup_offer': "Save up to 30% on Software",
+        'get_deal': "Get Deal",
+    },
+    'es': {
+        'title': "{name_a} vs {name_b}: ¿Cuál es mejor en 2026? (Análisis honesto)",
+        'meta_description': "Comparativa imparcial de {name_a} vs {name_b}. {summary}...",
+        'article': """
+            <div class="battle-section">
+                <h2>El enfrentamiento definitivo: {name_a} vs {name_b}</h2>
+                <p>En el competitivo mundo de las herramientas SEO, elegir entre <strong>{name_a}</strong> y <strong>{name_b}</strong> es un dilema habitual. Ambas plataformas ofrecen funciones potentes, pero responden a necesidades distintas.</p>
+
+                <h3>1. A fondo: {name_a}</h3>
+                {a.deep_dive}
+
+                <h3>2. A fondo: {name_b}</h3>
+                {b.deep_dive}
+
+                <h3>3. Funciones y precio</h3>
+                <p>{name_a} parte de {a.price}, mientras que {name_b} cuesta {b.price}.
+                Si el presupuesto es tu prioridad, revisa con atención los precios de arriba.</p>
+                {chart}
+
+                <h3>4. Recomendación final</h3>
+                <p>Si necesitas <strong>{a.top_pro}</strong>, {name_a} es probablemente tu mejor opción.</p>
+                <p>En cambio, si priorizas <strong>{b.top_pro}</strong>, {name_b} se lleva la victoria.</p>
+            </div>
+            """,
+        'verdict_label': "Veredicto:",
+        'review_pending': "Análisis pendiente...",
+        'chart_title': "Comparación de precio mensual",
+        'chart_caption': "Precio mensual",
+        'updated': "Actualizado: {date}",
+        'months': ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+                   'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'),
+        'claim_now': "Obtener ahora &rarr;",
+        'all_comparisons': "← Todas las comparativas",
+        'headline': "¿Qué herramienta gana la batalla SEO en 2026?",
+        'check_price': "Ver precio",
+        'privacy': "Política de privacidad",
+        'terms': "Términos del servicio",
+        'popup_title': "¡Espera! No te lo pierdas",
+        'popup_text': "Hemos encontrado una oferta especial para ti.",
+        'popup_offer': "Ahorra hasta un 30% en software",
+        'get_deal': "Ver oferta",
+    },
+    'pt': {
+        'title': "{name_a} vs {name_b}: Qual é melhor em 2026? (Análise honesta)",
+        'meta_description': "Comparação imparcial de {name_a} vs {name_b}. {summary}...",
+        'article': """
+            <div class="battle-section">
+                <h2>O confronto definitivo: {name_a} vs {name_b}</h2>
+                <p>No competitivo mundo das ferramentas de SEO, escolher entre <strong>{name_a}</strong> e <strong>{name_b}</strong> é um dilema comum. As duas plataformas oferecem recursos poderosos, mas atendem a necessidades diferentes.</p>
+
+                <h3>1. Em detalhe: {name_a}</h3>
+                {a.deep_dive}
+
+                <h3>2. Em detalhe: {name_b}</h3>
+                {b.deep_dive}
+
+                <h3>3. Recursos e preço</h3>
+                <p>{name_a} começa em {a.price}, enquanto {name_b} custa {b.price}.
+                Se o orçamento é sua prioridade, confira com atenção os preços acima.</p>
+                {chart}
+
+                <h3>4. Recomendação final</h3>
+                <p>Se você precisa de <strong>{a.top_pro}</strong>, {name_a} é provavelmente a melhor escolha.</p>
+                <p>Já para quem prioriza <strong>{b.top_pro}</strong>, {name_b} é o vencedor.</p>
+            </div>
+            """,
+        'verdict_label': "Veredito:",
+        'review_pending': "Análise pendente...",
+        'chart_title': "Comparação de preço mensal",
+        'chart_caption': "Preço mensal",
+        'updated': "Atualizado: {date}",
+        'months': ('janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+                   'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'),
+        'claim_now': "Aproveitar agora &rarr;",
+        'all_comparisons': "← Todas as comparações",
+        'headline': "Qual ferramenta vence a batalha de SEO em 2026?",
+        'check_price': "Ver preço",
+        'privacy': "Política de Privacidade",
+        'terms': "Termos de Serviço",
+        'popup_title': "Espere! Não perca",
+        'popup_text': "Encontramos uma oferta especial para você.",
+        'popup_offer': "Economize até 30% em software",
+        'get_deal': "Pegar oferta",
+    },
+}
+
+
+def has_value(value):
+    return not is_missing(value) and value != FILL_VALUE and str(value).strip() != ''
+
+
+class Locale:
+    __slots__ = ('code', 'prefix', 'root', 'strings', 'suffix')
+
+    def __init__(self, code):
+        self.code = code
+        default = code == DEFAULT_LOCALE
+        # 页面文件的相对路径前缀；root 为页面回到站点根目录的相对路径
+        self.prefix = '' if default else f"{code}/"
+        self.root = '' if default else '../'
+        self.strings = STRINGS[code]
+        self.suffix = None if default else f"_{code.upper()}"
+
+    def path(self, filename):
+        return self.prefix + filename
+
+    def localize(self, tool):
+        """把 Pros/Cons/Verdict 换成本语言的列；没有译文的字段保留英文。"""
+        if self.suffix is None:
+            return tool
+        record = dict(tool)
+        for field in LOCALIZED_FIELDS:
+            value = tool.get(field + self.suffix)
+            if has_value(value):
+                record[field] = value
+        return ToolRecord(record)
+
+    def format_date(self, date):
+        """'October 2026' -> 本语言的月份名。"""
+        month, _, year = date.partition(' ')
+        if month in MONTHS_EN:
+            month = self.strings['months'][MONTHS_EN.index(month)]
+        return self.strings['updated'].format(date=f"{month} {year}".strip())
+
+
+def resolve_locales(config):
+    """config.json 的 "locales"（默认只有英文）；英文总是排在第一个。"""
+    codes = config.get('locales') or [DEFAULT_LOCALE]
+    locales = [Locale(DEFAULT_LOCALE)]
+    for code in codes:
+        if code == DEFAULT_LOCALE or code in {loc.code for loc in locales}:
+            continue
+        if code not in STRINGS:
+            print(f"⚠️ Unknown locale {code!r}. Supported: {', '.join(STRINGS)}.")
+            continue
+        locales.append(Locale(code))
+    return locales
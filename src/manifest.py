@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# Tiandao Build Manifest
+# 记录每个工具的行哈希、模板/配置哈希以及输出文件摘要，用于增量构建
+# 页面摘要存放在 SQLite 中，百万级页面也不需要整体读入内存
+
+MANIFEST_VERSION = 3
+
+
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_text(text):
+    return hash_bytes(str(text).encode('utf-8'))
+
+
+def hash_file(path):
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'rb') as f:
+        return hash_bytes(f.read())
+
+
+def hash_record(record):
+    return hash_text(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str))
+
+
+class BuildManifest:
+    def __init__(self, output_dir):
+        self.dir = os.path.join(output_dir, '.build')
+        self.path = os.path.join(self.dir, 'manifest.sqlite')
+        self.globals_hash = ""
+        self.tools = {}   # tool_name -> row hash
+        self.build_id = 0
+        self.conn = None
+        self.readonly = False
+
+    def __getstate__(self):
+        # 连接不能跨进程传递，worker 会以只读方式重新打开
+        state = self.__dict__.copy()
+        state['conn'] = None
+        state['readonly'] = True
+        return state
+
+    def connect(self):
+        if self.conn is not None:
+            return self.conn
+        if self.readonly:
+            if not os.path.exists(self.path):
+                return None
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            return self.conn
+
+        os.makedirs(self.dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS tools (name TEXT PRIMARY KEY, hash TEXT)")
+        self._create_pages()
+        self.conn.commit()
+        return self.conn
+
+    def _create_pages(self):
+        # updated 记录页面内容最后一次变化的时间，用作 sitemap 的 lastmod
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "filename TEXT PRIMARY KEY, tool_a TEXT, tool_b TEXT, digest TEXT, build INTEGER, updated REAL)"
+        )
+
+    def reset(self):
+        """清空旧格式或损坏的 manifest。"""
+        conn = self.connect()
+        conn.execute("DELETE FROM meta")
+        conn.execute("DELETE FROM tools")
+        conn.execute("DROP TABLE IF EXISTS pages")
+        self._create_pages()
+        conn.commit()
+        self.globals_hash = ""
+        self.tools = {}
+        self.build_id = 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def load(self):
+        """读取上一次构建的状态。返回 False 表示需要全量构建。"""
+        try:
+            conn = self.connect()
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if meta.get('version') != str(MANIFEST_VERSION):
+                self.reset()
+                return False
+            self.globals_hash = meta.get('globals', "")
+            self.build_id = int(meta.get('build', 0))
+            self.tools = dict(conn.execute("SELECT name, hash FROM tools"))
+            return True
+        except Exception as e:
+            print(f"⚠️ Manifest unreadable, falling back to full build: {e}")
+            return False
+
+    def begin_build(self):
+        self.connect()
+        self.build_id += 1
+
+    def get_digest(self, filename):
+        conn = self.connect()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT digest FROM pages WHERE filename = ?", (filename,)).fetchone()
+        return row[0] if row else None
+
+    def get_lastmod(self, filename):
+        conn = self.connect()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT updated FROM pages WHERE filename = ?", (filename,)).fetchone()
+        return row[0] if row else None
+
+    def put_pages(self, entries):
+        """entries: [(filename, tool_a, tool_b, digest), ...]；摘要不变时保留原 updated。"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT INTO pages (filename, tool_a, tool_b, digest, build, updated) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(filename) DO UPDATE SET tool_a = excluded.tool_a, tool_b = excluded.tool_b, "
+            "build = excluded.build, updated = CASE WHEN pages.digest = excluded.digest "
+            "THEN pages.updated ELSE excluded.updated END, digest = excluded.digest",
+            [(filename, a, b, digest, self.build_id, now) for filename, a, b, digest in entries],
+        )
+
+    def touch_pages(self, filenames):
+        self.conn.executemany(
+            "UPDATE pages SET build = ? WHERE filename = ?",
+            [(self.build_id, filename) for filename in filenames],
+        )
+
+    def sweep_pages(self):
+        """删除本次构建未出现过的页面记录，返回对应文件名。"""
+        stale = [row[0] for row in self.conn.execute(
+            "SELECT filename FROM pages WHERE build != ?", (self.build_id,)
+        )]
+        self.conn.execute("DELETE FROM pages WHERE build != ?", (self.build_id,))
+        return stale
+
+    def save(self):
+        conn = self.connect()
+        conn.execute("DELETE FROM meta")
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ('version', str(MANIFEST_VERSION)),
+            ('globals', self.globals_hash),
+            ('build', str(self.build_id)),
+        ])
+        conn.execute("DELETE FROM tools")
+        conn.executemany("INSERT INTO tools (name, hash) VALUES (?, ?)", self.tools.items())
+        conn.commit()
+
+
+def compute_tool_hashes(tools):
+    """按工具名聚合行哈希（重复行会合并进同一个哈希）。"""
+    hashes = {}
+    for tool in tools:
+        name = str(tool.get('Tool_Name', 'Unknown')).strip()
+        row_hash = hash_record(dict(tool))
+        hashes[name] = hash_text(hashes[name] + row_hash) if name in hashes else row_hash
+    return hashes
+
+
+def diff_tools(old_hashes, new_hashes):
+    """返回 (changed, removed)：changed 包含新增或内容变化的工具。"""
+    changed = {name for name, h in new_hashes.items() if old_hashes.get(name) != h}
+    removed = set(old_hashes) - set(new_hashes)
+    return changed, removed
@@ -0,0 +1,230 @@
+import os
+import re
+import math
+from bisect import bisect_left
+from collections import Counter
+
+from normalize import monthly_prices
+from pipeline import PairOwnership, count_pairs, iter_pairs, pair_filename, slug_part
+from toolstore import FILL_VALUE, ToolStore, is_missing
+
+# Tiandao Matchup Graph
+# 决定生成哪些对战页：
+#   mode = "all"  : 全部 combinations（原有行为）
+#   mode = "topk" : 每个工具只和最相近的 k 个竞品对战（价格、月访问量、Features/Description 词向量），
+#                   两个工具只要有一方把对方选进 top-k 就生成这一页
+# 渲染、Hub 页和 sitemap 都只遍历这里选出的 pair
+
+DEFAULT_K = 4
+DEFAULT_WEIGHTS = {'text': 0.6, 'price': 0.2, 'traffic': 0.2}
+TOKEN_RE = re.compile(r'[a-z][a-z0-9]{2,}')
+STOPWORDS = frozenset('the and for with you your our are its from that this into all can has have more'.split())
+# 相似度矩阵按行分块计算，每块大约 BLOCK_CELLS 个元素
+BLOCK_CELLS = 1 << 22
+
+
+class AllPairs:
+    """全部 pair；同名工具映射到同一文件时由 PairOwnership 决定哪一对负责渲染。"""
+    mode = 'all'
+
+    def __init__(self, names, slugs=None):
+        self.names = names
+        self.ownership = PairOwnership(names, slugs)
+        self.slugs = self.ownership.keys
+        self.pair_count = count_pairs(len(names))
+
+    def pairs(self, rows=None):
+        owns = self.ownership.owns
+        for i, j in iter_pairs(len(self.names), rows):
+            if owns(i, j):
+                yield i, j
+
+    def has_pair(self, i, j):
+        return i < j and self.ownership.owns(i, j)
+
+    def describe(self):
+        return f"{self.pair_count} pairs"
+
+    def matchups_for(self, key, failed=()):
+        """某个工具参与的全部对战页 [(文件名, 对手名)]（文件名去重，跳过同名自比）。"""
+        names, keys = self.names, self.ownership.keys
+        matchups = {}
+        for p in self.ownership.positions[key]:
+            for i, other in enumerate(names):
+                if keys[i] == key:
+                    continue
+                filename = pair_filename(keys[i], key) if i < p else pair_filename(key, keys[i])
+                if filename not in failed:
+                    matchups[filename] = other
+        return list(matchups.items())
+
+
+class SelectedPairs:
+    """只包含选中 pair 的稀疏图：by_row[i] 为 tool_a 在第 i 行时的 j 列表（升序）。"""
+    mode = 'topk'
+
+    def __init__(self, names, pairs, k, slugs=None):
+        self.names = names
+        self.slugs = list(slugs) if slugs is not None else [slug_part(name) for name in names]
+        self.k = k
+        self.by_row = {}
+        for i, j in sorted(pairs):
+            self.by_row.setdefault(i, []).append(j)
+        self.pair_count = len(pairs)
+        self.hubs = None
+
+    def pairs(self, rows=None):
+        for i in (range(len(self.names)) if rows is None else rows):
+            for j in self.by_row.get(i, ()):
+                yield i, j
+
+    def has_pair(self, i, j):
+        row = self.by_row.get(i, ())
+        pos = bisect_left(row, j)
+        return pos < len(row) and row[pos] == j
+
+    def describe(self):
+        return f"{self.pair_count} of {count_pairs(len(self.names))} pairs (top-{self.k})"
+
+    def matchups_for(self, key, failed=()):
+        if self.hubs is None:
+            # 图是稀疏的，一次遍历建好所有工具的邻接表
+            names, slugs = self.names, self.slugs
+            self.hubs = {}
+            for i, j in self.pairs():
+                filename = pair_filename(slugs[i], slugs[j])
+                self.hubs.setdefault(slugs[i], []).append((filename, names[j]))
+                self.hubs.setdefault(slugs[j], []).append((filename, names[i]))
+        return [(filename, other) for filename, other in self.hubs.get(key, ()) if filename not in failed]
+
+
+def tokenize(*values):
+    tokens = []
+    for value in values:
+        if is_missing(value) or value == FILL_VALUE:
+            continue
+        tokens.extend(t for t in TOKEN_RE.findall(str(value).lower()) if t not in STOPWORDS)
+    return tokens
+
+
+def load_traffic(path):
+    """tools_raw.csv 中的 Monthly_Visits，按 slug 索引。"""
+    if not path or not os.path.exists(path):
+        return {}
+    store = ToolStore.open(path)
+    if 'Monthly_Visits' not in store.columns:
+        return {}
+    traffic = {}
+    for name, visits in zip(store.column('Tool_Name'), store.column('Monthly_Visits')):
+        try:
+            traffic.setdefault(slug_part(name.strip()), float(visits.replace(',', '')))
+        except ValueError:
+            continue
+    return traffic
+
+
+def zscore(np, values):
+    """缺失值用已知值的中位数补齐，取 log 后标准化；全部缺失时返回全 0。"""
+    known = [v for v in values if v is not None and v >= 0]
+    if not known:
+        return np.zeros(len(values), dtype=np.float32)
+    fill = sorted(known)[len(known) // 2]
+    column = np.log1p(np.array([fill if v is None or v < 0 else v for v in values], dtype=np.float64))
+    std = column.std()
+    if std == 0:
+        return np.zeros(len(values), dtype=np.float32)
+    return ((column - column.mean()) / std).astype(np.float32)
+
+
+def feature_matrix(np, tools, traffic):
+    """返回 (text, price, visits)：text 为 L2 归一化的 TF-IDF 矩阵，price/visits 为标准化后的一维数组。"""
+    docs = [Counter(tokenize(tool.get('Features'), tool.get('Description'))) for tool in tools]
+    df = Counter(token for doc in docs for token in doc)
+    vocab = {token: idx for idx, token in enumerate(sorted(df))}
+    text = np.zeros((len(tools), max(1, len(vocab))), dtype=np.float32)
+    n = len(tools)
+    for row, doc in enumerate(docs):
+        for token, tf in doc.items():
+            text[row, vocab[token]] = tf * (math.log((1 + n) / (1 + df[token])) + 1)
+    norms = np.linalg.norm(text, axis=1, keepdims=True)
+    text /= np.where(norms > 0, norms, 1)
+
+    price = zscore(np, monthly_prices(tools))
+    visits = zscore(np, [traffic.get(slug_part(str(tool.get('Tool_Name', '')).strip())) for tool in tools])
+    return text, price, visits
+
+
+def top_k_neighbours(np, text, price, visits, k, weights):
+    """分块计算相似度，返回每个工具最相近的 k 个工具下标。"""
+    m = text.shape[0]
+    k = min(k, m - 1)
+    if k <= 0:
+        return [[] for _ in range(m)]
+    block = max(1, BLOCK_CELLS // m)
+    neighbours = []
+    for start in range(0, m, block):
+        stop = min(m, start + block)
+        score = text[start:stop] @ text.T
+        score *= weights['text']
+        for column, weight in ((price, weights['price']), (visits, weights['traffic'])):
+            # 数值特征用高斯核 exp(-d²/2)，原地计算减少临时数组
+            kernel = column[start:stop, None] - column[None, :]
+            np.square(kernel, out=kernel)
+            kernel *= -0.5
+            np.exp(kernel, out=kernel)
+            kernel *= weight
+            score += kernel
+        score[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        # argpartition 取 top-k，再按 (分数降序, 下标) 排序保证结果确定
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        for offset, candidates in enumerate(top):
+            ranked = sorted(candidates.tolist(), key=lambda c: (-score[offset, c], c))
+            neighbours.append(ranked)
+    return neighbours
+
+
+def select_pairs(slugs, tools, k, weights, traffic):
+    """按 slug 去重后做 top-k 选择，再映射回全量模式下负责该文件的 (i, j)。"""
+    import numpy as np
+
+    positions = {}
+    for idx, slug in enumerate(slugs):
+        positions.setdefault(slug, []).append(idx)
+    keys = list(positions)
+
+    # 同名工具取第一次出现的那一行作为代表
+    reps = [tools[positions[key][0]] for key in keys]
+    text, price, visits = feature_matrix(np, reps, traffic)
+    neighbours = top_k_neighbours(np, text, price, visits, k, weights)
+
+    pairs = set()
+    for a, chosen in enumerate(neighbours):
+        for b in chosen:
+            # keys 按首次出现排序：先出现的工具在左侧。与全量模式相同，
+            # 由右侧工具的最后一行和它之前左侧工具的最后一行负责这个文件
+            rows_a, rows_b = positions[keys[min(a, b)]], positions[keys[max(a, b)]]
+            j = rows_b[-1]
+            pairs.add((rows_a[bisect_left(rows_a, j) - 1], j))
+    return pairs
+
+
+def build_matchups(names, tools, config, base_dir, slugs=None):
+    options = config.get('matchups', {})
+    mode = options.get('mode', 'all')
+    slugs = list(slugs) if slugs is not None else [slug_part(name) for name in names]
+    if mode == 'all':
+        return AllPairs(names, slugs)
+    if mode != 'topk':
+        print(f"⚠️ Unknown matchups.mode {mode!r}. Using all pairs.")
+        return AllPairs(names, slugs)
+
+    k = int(options.get('k', DEFAULT_K))
+    weights = dict(DEFAULT_WEIGHTS, **options.get('weights', {}))
+    traffic_file = os.path.join(base_dir, options.get('traffic_file', os.path.join('data', 'tools_raw.csv')))
+    try:
+        pairs = select_pairs(slugs, tools, k, weights, load_traffic(traffic_file))
+    except ImportError:
+        print("⚠️ numpy is not installed; matchups.mode 'topk' needs it. Using all pairs.")
+        return AllPairs(names, slugs)
+    return SelectedPairs(names, pairs, k, slugs)
+
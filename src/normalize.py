@@ -0,0 +1,162 @@
+import re
+
+from pipeline import slug_part
+from toolstore import is_missing
+
+# Tiandao Data Normalizer
+# 渲染前对 data.csv 整表做一次校验和规范化，结果作为 ToolStore 的 transform 缓存在
+# data/.cache/<csv>.normalized.snap，CSV 不变时直接加载，不再逐行处理：
+#   - 校验：丢弃没有 Tool_Name 的行和混进数据里的表头行，名称去掉多余空白
+#   - 去重合并：名称只差大小写/空白的行视为同一工具，保留首次出现的位置和名称写法，其他字段取最后一个非空值
+#   - 价格：解析成月付数值写入 Price_Monthly（年付 /12，Free 为 0，无法解析时为空）
+#   - Slug：预先生成唯一的文件名 slug 写入 Slug，冲突时追加 -2、-3 并给出警告
+# 价格、slug 等按值计算的步骤对每个不同的字符串只做一次
+
+NORMALIZE_VERSION = 1
+SLUG_COLUMN = 'Slug'
+PRICE_COLUMN = 'Price_Monthly'
+# 价格字符串中的第一个数字（'$1,299/yr' -> 1,299）
+PRICE_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)')
+YEARLY_RE = re.compile(r'/\s*(?:yr|year|annum)\b|\bper\s+year\b|\b(?:annual|annually|yearly)\b', re.I)
+FREE_RE = re.compile(r'\bfree\b', re.I)
+# 不能出现在文件名里的字符
+UNSAFE_SLUG_RE = re.compile(r'[/\\?#%&"\'<>]+')
+
+
+def parse_monthly_price(value):
+    """'$49/mo' -> 49.0，'$588/yr' -> 49.0，'29.90' -> 29.9，'Free' -> 0.0；无法解析返回 None。"""
+    if is_missing(value):
+        return None
+    text = str(value)
+    match = PRICE_RE.search(text)
+    if not match:
+        return 0.0 if FREE_RE.search(text) else None
+    amount = float(match.group(1).replace(',', ''))
+    if YEARLY_RE.search(text):
+        amount /= 12
+    return round(amount, 2)
+
+
+def to_price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def monthly_prices(tools):
+    """每个工具的月付价格：优先取 Price_Monthly，没有该列（未规范化的数据）时解析 Price。"""
+    memo = {}
+    prices = []
+    for tool in tools:
+        normalized = PRICE_COLUMN in tool
+        value = tool.get(PRICE_COLUMN) if normalized else tool.get('Price')
+        key = (normalized, value if isinstance(value, str) else repr(value))
+        if key not in memo:
+            memo[key] = to_price(value) if normalized else parse_monthly_price(value)
+        prices.append(memo[key])
+    return prices
+
+
+def price_value(tool):
+    return monthly_prices([tool])[0]
+
+
+def name_key(name):
+    return name.casefold()
+
+
+def make_slug(name):
+    return UNSAFE_SLUG_RE.sub('-', slug_part(name)) or 'tool'
+
+
+class Normalizer:
+    """ToolStore.open 的 transform：(columns, rows) -> (columns, rows, meta)。"""
+    name = 'normalized'
+    version = NORMALIZE_VERSION
+
+    def __call__(self, columns, records):
+        if 'Tool_Name' not in columns:
+            raise ValueError("missing Tool_Name column")
+        name_idx = columns.index('Tool_Name')
+        price_idx = columns.index('Price') if 'Price' in columns else None
+
+        # 1. 校验 + 分组：只扫描名称列，每个不同的名称只清洗一次
+        clean = {}
+        groups = {}
+        dropped = 0
+        for row, record in enumerate(records):
+            raw = record[name_idx]
+            if raw not in clean:
+                name = ' '.join(raw.split())
+                clean[raw] = None if is_missing(name) or name == 'Tool_Name' else name
+            name = clean[raw]
+            if name is None:
+                dropped += 1
+                continue
+            groups.setdefault(name_key(name), []).append(row)
+
+        # 2. 合并重复行：写在后面的行较新，非空字段覆盖前面的值；名称沿用首次出现的写法
+        merged = []
+        for rows in groups.values():
+            record = list(records[rows[0]])
+            name = clean[record[name_idx]]
+            for row in rows[1:]:
+                for col, value in enumerate(records[row]):
+                    if not is_missing(value):
+                        record[col] = value
+            record[name_idx] = name
+            merged.append(record)
+
+        # 3. 价格：每个不同的价格字符串只解析一次
+        memo = {}
+        unpriced = 0
+        prices = []
+        for record in merged:
+            raw = record[price_idx] if price_idx is not None else ''
+            if raw not in memo:
+                price = parse_monthly_price(raw)
+                memo[raw] = '' if price is None else f"{price:.2f}"
+            prices.append(memo[raw])
+            unpriced += memo[raw] == ''
+
+        # 4. 唯一 slug
+        used = set()
+        collisions = []
+        slugs = []
+        for record in merged:
+            base = slug = make_slug(record[name_idx])
+            n = 1
+            while slug in used:
+                n += 1
+                slug = f"{base}-{n}"
+            if slug != base:
+                collisions.append([record[name_idx], slug])
+            used.add(slug)
+            slugs.append(slug)
+
+        extra = {SLUG_COLUMN: slugs, PRICE_COLUMN: prices}
+        out_columns = list(columns) + [c for c in extra if c not in columns]
+        positions = {c: out_columns.index(c) for c in extra}
+        width = len(out_columns)
+        for idx, record in enumerate(merged):
+            record.extend([''] * (width - len(record)))
+            for column, values in extra.items():
+                record[positions[column]] = values[idx]
+
+        meta = {
+            'rows': len(records), 'tools': len(merged), 'dropped': dropped,
+            'merged': len(records) - dropped - len(merged), 'unpriced': unpriced, 'collisions': collisions,
+        }
+        return out_columns, merged, meta
+
+
+def report(meta):
+    """打印规范化统计（来自快照头，命中缓存时也能显示）。"""
+    if not meta:
+        return
+    print(f"🧹 Normalized {meta['rows']} rows -> {meta['tools']} tools "
+          f"({meta['merged']} duplicate rows merged, {meta['dropped']} invalid rows dropped, "
+          f"{meta['unpriced']} without a parsable price).")
+    for name, slug in meta['collisions']:
+        print(f"⚠️ Slug collision: {name!r} uses slug {slug!r} instead.")
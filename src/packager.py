@@ -0,0 +1,207 @@
+import os
+import re
+import gzip
+import shutil
+import hashlib
+
+from manifest import hash_text
+
+from jinja2 import FileSystemLoader
+
+# Tiandao Output Packager
+# 部署前的输出处理（config.json 的 "package" 段控制，默认全部关闭）：
+#   minify      : 压缩 HTML 空白、去掉注释；<pre>/<textarea> 原样保留，<script> 只去缩进
+#   extract_css : 页面里共享的 <style> 块移到按内容哈希命名的 /assets/style-<hash>.css
+#   gzip        : 为 HTML/CSS/JS/JSON/SVG/XML 写一个预压缩的 .gz 兄弟文件
+# 对战页在写盘线程里处理；模板里的 <style> 在加载模板时就替换成 <link>，不必每页再提取
+
+ASSET_DIR = 'assets'
+GZIP_SUFFIX = '.gz'
+COMPRESSIBLE = ('.html', '.css', '.js', '.json', '.svg', '.xml')
+STYLESHEET_RE = re.compile(r'^style-[0-9a-f]+\.css(\.gz)?$')
+
+STYLE_RE = re.compile(r'<style>(.*?)</style>', re.S)
+PROTECTED_RE = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2>)', re.S | re.I)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+SPACE_RE = re.compile(r'\s+')
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_PUNCT_RE = re.compile(r'\s*([{};,])\s*|(?<=:)\s+')
+
+
+def minify_css(css):
+    css = CSS_COMMENT_RE.sub('', css)
+    css = SPACE_RE.sub(' ', css)
+    css = CSS_PUNCT_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def collapse_space(text):
+    """与 SPACE_RE.sub(' ', text) 结果相同；str.split 比正则替换快约 3 倍，写盘线程里每页都要跑。"""
+    words = text.split()
+    if not words:
+        return ' ' if text else ''
+    collapsed = ' '.join(words)
+    if text[0].isspace():
+        collapsed = ' ' + collapsed
+    if text[-1].isspace():
+        collapsed += ' '
+    return collapsed
+
+
+def minify_html(text):
+    parts = []
+    pos = 0
+    for match in PROTECTED_RE.finditer(text):
+        parts.append(collapse_space(COMMENT_RE.sub('', text[pos:match.start()])))
+        block, tag = match.group(1), match.group(2).lower()
+        if tag == 'script':
+            # 逐行去缩进，保留换行（脚本里可能有 // 注释）
+            block = '\n'.join(line.strip() for line in block.splitlines() if line.strip())
+        elif tag == 'style':
+            open_end = block.index('>') + 1
+            block = block[:open_end] + minify_css(block[open_end:-len('</style>')]) + '</style>'
+        parts.append(block)
+        pos = match.end()
+    parts.append(collapse_space(COMMENT_RE.sub('', text[pos:])))
+    return ''.join(parts).strip()
+
+
+def gzip_bytes(data):
+    # mtime=0：相同内容的压缩结果字节级一致
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def write_bytes(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Packager:
+    def __init__(self, output_dir, options=None):
+        options = options or {}
+        self.output_dir = output_dir
+        self.minify = bool(options.get('minify', False))
+        self.extract_css = bool(options.get('extract_css', False))
+        self.gzip = bool(options.get('gzip', False))
+        # 影响写出字节的选项；gzip 只影响 .gz 兄弟文件，由 missing() 处理
+        self.signature = f"minify={int(self.minify)},extract_css={int(self.extract_css)}"
+        self.stylesheets = set()
+
+    def stylesheet(self, css):
+        """写出（如不存在）按内容哈希命名的样式表，返回站点根路径下的 URL。"""
+        css = minify_css(css) if self.minify else css.strip()
+        data = css.encode('utf-8')
+        name = f"style-{hashlib.sha256(data).hexdigest()[:12]}.css"
+        path = os.path.join(self.output_dir, ASSET_DIR, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_bytes(path, data)
+        if self.gzip and not os.path.exists(path + GZIP_SUFFIX):
+            write_bytes(path + GZIP_SUFFIX, gzip_bytes(data))
+        self.stylesheets.add(name)
+        return f"/{ASSET_DIR}/{name}"
+
+    def externalize_styles(self, text):
+        """把 <style> 块换成指向共享样式表的 <link>；含 Jinja 语法的块保持内联。"""
+        if not self.extract_css:
+            return text
+
+        def replace(match):
+            css = match.group(1)
+            if '{{' in css or '{%' in css:
+                return match.group(0)
+            return f'<link rel="stylesheet" href="{self.stylesheet(css)}">'
+        return STYLE_RE.sub(replace, text)
+
+    def package(self, filename, content):
+        """HTML 页面：提取共享 CSS 并压缩；其他文件原样返回。"""
+        if not filename.endswith('.html'):
+            return content
+        content = self.externalize_styles(content)
+        return minify_html(content) if self.minify else content
+
+    def digest(self, content):
+        """渲染结果（打包前）的摘要，带上打包选项：只切换 minify/extract_css 时摘要也会变化，页面会重写。"""
+        return hash_text(f"{self.signature}\n{content}")
+
+    def missing(self, path):
+        """文件或（开启 gzip 时）它的 .gz 兄弟文件不存在。"""
+        if not os.path.exists(path):
+            return True
+        return self.gzip and path.endswith(COMPRESSIBLE) and not os.path.exists(path + GZIP_SUFFIX)
+
+    def write(self, path, content, stats=None, original_size=None):
+        """写文件（和 .gz 兄弟文件），把写入前后的字节数记进 PageStats。"""
+        data = content.encode('utf-8')
+        write_bytes(path, data)
+        gz_size = 0
+        if self.gzip and path.endswith(COMPRESSIBLE):
+            packed = gzip_bytes(data)
+            write_bytes(path + GZIP_SUFFIX, packed)
+            gz_size = len(packed)
+        if stats is not None:
+            stats.add_bytes(len(data) if original_size is None else original_size, len(data), gz_size)
+
+    def sweep(self):
+        """删除本次构建未引用的旧样式表。"""
+        folder = os.path.join(self.output_dir, ASSET_DIR)
+        if not os.path.isdir(folder):
+            return
+        for filename in os.listdir(folder):
+            base = filename[:-len(GZIP_SUFFIX)] if filename.endswith(GZIP_SUFFIX) else filename
+            if STYLESHEET_RE.match(filename) and base not in self.stylesheets:
+                os.remove(os.path.join(folder, filename))
+
+    def sync_assets(self, source_dir, target_dir):
+        """只复制内容有变化的静态文件，并删除源目录中已不存在的文件。返回 (copied, unchanged, removed)。"""
+        copied = unchanged = removed = 0
+        wanted = set()
+        for folder, _, files in os.walk(source_dir):
+            rel = os.path.relpath(folder, source_dir)
+            dest_folder = os.path.normpath(os.path.join(target_dir, rel))
+            os.makedirs(dest_folder, exist_ok=True)
+            for filename in files:
+                src, dest = os.path.join(folder, filename), os.path.join(dest_folder, filename)
+                wanted.add(os.path.normpath(dest))
+                compress = self.gzip and filename.endswith(COMPRESSIBLE)
+                if compress:
+                    wanted.add(os.path.normpath(dest + GZIP_SUFFIX))
+                if (os.path.exists(dest) and os.path.getsize(dest) == os.path.getsize(src)
+                        and file_digest(dest) == file_digest(src)
+                        and (not compress or os.path.exists(dest + GZIP_SUFFIX))):
+                    unchanged += 1
+                    continue
+                shutil.copy2(src, dest)
+                if compress:
+                    with open(src, 'rb') as f:
+                        write_bytes(dest + GZIP_SUFFIX, gzip_bytes(f.read()))
+                copied += 1
+        for folder, _, files in os.walk(target_dir):
+            for filename in files:
+                path = os.path.normpath(os.path.join(folder, filename))
+                if path not in wanted:
+                    os.remove(path)
+                    removed += 1
+        return copied, unchanged, removed
+
+
+class PackagingLoader(FileSystemLoader):
+    """加载模板源码时先把共享 <style> 换成哈希样式表链接。"""
+
+    def __init__(self, searchpath, packager):
+        super().__init__(searchpath)
+        self.packager = packager
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        return self.packager.externalize_styles(source), filename, uptodate
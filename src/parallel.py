@@ -0,0 +1,95 @@
+import os
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline import plan_shards
+
+# Tiandao Parallel Renderer
+# 把对战页按行 (tool_a) 切分成多个分片，交给多个进程各自渲染
+
+SHARDS_PER_WORKER = 4
+IN_FLIGHT_PER_WORKER = 2
+
+# 每个 worker 进程自己的状态（由 initializer 填充）
+_WORKER = {}
+
+
+def fork_context():
+    """worker 通过 fork 继承父进程里的 generator、工具列表和 pair 图；没有 fork 的平台（Windows）返回 None。
+
+    固定用 fork 而不是平台默认的启动方式：spawn 会在子进程里重新导入 __main__ 并要求参数可 pickle。
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def resolve_workers(config):
+    value = config.get('build', {}).get('workers', 1)
+    if value in (None, 0, 'auto'):
+        workers = os.cpu_count() or 1
+    else:
+        try:
+            workers = max(1, int(value))
+        except (TypeError, ValueError):
+            print(f"⚠️ Invalid build.workers value: {value!r}. Using 1.")
+            return 1
+    if workers > 1 and fork_context() is None:
+        print("⚠️ Multi-process rendering needs the 'fork' start method. Rendering in one process.")
+        return 1
+    return workers
+
+
+def _init_worker(generator, tools, graph):
+    # fork 出来的进程不能复用父进程的 SQLite 连接
+    generator.manifest.conn = None
+    generator.manifest.readonly = True
+    _WORKER['generator'] = generator
+    _WORKER['tools'] = tools
+    _WORKER['graph'] = graph
+    # 每个进程使用独立的 Jinja Environment
+    _WORKER['templates'] = generator.load_page_templates()
+
+
+def _render_shard(rows):
+    generator = _WORKER['generator']
+    start = time.perf_counter()
+    result = generator.render_shard(_WORKER['templates'], _WORKER['tools'], rows, _WORKER['graph'])
+    return os.getpid(), result, time.perf_counter() - start
+
+
+def render_parallel(generator, tools, graph, workers):
+    """按分片顺序逐个产出 render_shard 的结果；同时在途的分片数有上限。"""
+    shards = plan_shards(len(tools), workers * SHARDS_PER_WORKER, graph.pair_count)
+    print(f"🧵 Rendering with {workers} workers across {len(shards)} shards...")
+
+    # 子进程读取的是已提交的 manifest 快照
+    generator.manifest.conn.commit()
+    stats = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=fork_context(),
+        initializer=_init_worker,
+        initargs=(generator, tools, graph),
+    ) as pool:
+        pending = deque()
+        shard_iter = iter(shards)
+        for rows in shard_iter:
+            pending.append(pool.submit(_render_shard, rows))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                break
+        while pending:
+            pid, result, elapsed = pending.popleft().result()
+            next_rows = next(shard_iter, None)
+            if next_rows is not None:
+                pending.append(pool.submit(_render_shard, next_rows))
+            pages, seconds = stats.get(pid, (0, 0.0))
+            stats[pid] = (pages + result[3], seconds + elapsed)
+            yield result
+
+    for idx, pid in enumerate(sorted(stats), start=1):
+        pages, seconds = stats[pid]
+        rate = pages / seconds if seconds > 0 else 0
+        print(f"   Worker {idx} (pid {pid}): {pages} pages in {seconds:.2f}s, {rate:.0f} pages/sec")
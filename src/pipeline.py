@@ -0,0 +1,160 @@
+import os
+import time
+import queue
+import threading
+from bisect import bisect_left
+
+# Tiandao Page Pipeline
+# 对战页按 生成 pair → 渲染 → 写盘 的流式链路处理，各环节只保留有限缓冲
+
+WRITE_QUEUE_SIZE = 64
+SHARD_PAIRS = 2000
+
+
+def slug_part(name):
+    return name.lower().replace(" ", "-").replace(".", "")
+
+
+def pair_filename(name_a, name_b):
+    return f"{slug_part(name_a)}-vs-{slug_part(name_b)}.html"
+
+
+def tool_slugs(tools):
+    """每个工具预先计算好的唯一 slug（normalize.py 写入的 Slug 列），没有时按名称生成。
+
+    slug_part 对 slug 本身是幂等的，所以 pair_filename(slug_a, slug_b) 可以直接使用。
+    """
+    slugs = []
+    for tool in tools:
+        slug = tool.get('Slug')
+        slugs.append(slug if slug else slug_part(str(tool.get('Tool_Name', 'Unknown')).strip()))
+    return slugs
+
+
+def count_pairs(n):
+    return n * (n - 1) // 2
+
+
+def iter_pairs(n, rows=None):
+    """按 combinations(range(n), 2) 的顺序惰性产出 (i, j)。"""
+    for i in (range(n) if rows is None else rows):
+        for j in range(i + 1, n):
+            yield i, j
+
+
+class PairOwnership:
+    """同名工具会映射到同一个文件：只有串行顺序中最后一次写入的那一对负责渲染。
+
+    这样多进程渲染时不会有两个 worker 同时写同一个文件，输出也与串行完全一致。
+    slugs 为 tool_slugs() 的结果；不传时按名称生成。
+    """
+    def __init__(self, names, slugs=None):
+        self.keys = list(slugs) if slugs is not None else [slug_part(name) for name in names]
+        self.positions = {}
+        for idx, key in enumerate(self.keys):
+            self.positions.setdefault(key, []).append(idx)
+
+    def owns(self, i, j):
+        last_b = self.positions[self.keys[j]][-1]
+        if j != last_b:
+            return False
+        positions_a = self.positions[self.keys[i]]
+        return positions_a[bisect_left(positions_a, last_b) - 1] == i
+
+
+class ToolRecord(dict):
+    """预处理后的工具记录。渲染阶段只读，避免在 pair 循环里被修改。"""
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("ToolRecord is read-only during rendering")
+
+    __setitem__ = __delitem__ = _readonly
+    update = pop = popitem = clear = setdefault = _readonly
+
+    def __reduce__(self):
+        return (ToolRecord, (dict(self),))
+
+
+class PageUrls:
+    """按 pair 顺序惰性产出已生成的页面文件名（每个文件一次），不在内存中保存完整列表。
+
+    graph 为 matchups.py 中的 AllPairs / SelectedPairs。
+    """
+
+    def __init__(self, graph, failed=None):
+        self.graph = graph
+        self.failed = failed or set()
+
+    def __iter__(self):
+        slugs = self.graph.slugs
+        for i, j in self.graph.pairs():
+            filename = pair_filename(slugs[i], slugs[j])
+            if filename not in self.failed:
+                yield filename
+
+    def __len__(self):
+        # 全量模式下 pair_count 包含同名重复的 pair，这里只做近似
+        return self.graph.pair_count - len(self.failed)
+
+
+class PageWriter:
+    """后台线程写盘，渲染线程通过有界队列投递，队列满时自动限流。"""
+
+    def __init__(self, output_dir, maxsize=WRITE_QUEUE_SIZE, stats=None, packager=None):
+        self.output_dir = output_dir
+        # 可选的 PageStats（见 tracing.py），写盘延迟和字节数只在写盘线程中更新
+        self.stats = stats
+        # 可选的 Packager（见 packager.py）：压缩 HTML、提取 CSS、写 .gz
+        self.packager = packager
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.errors = []
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            filename, content = item
+            start = time.perf_counter()
+            path = os.path.join(self.output_dir, filename)
+            try:
+                if self.packager is not None:
+                    packed = self.packager.package(filename, content)
+                    original = len(content.encode('utf-8')) if packed is not content else None
+                    self.packager.write(path, packed, self.stats, original)
+                else:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                self.written += 1
+                if self.stats is not None:
+                    self.stats.write.add(time.perf_counter() - start)
+            except Exception as e:
+                self.errors.append((filename, e))
+
+    def write(self, filename, content):
+        self.queue.put((filename, content))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        for filename, e in self.errors:
+            print(f"⚠️ Error writing {filename}: {e}")
+        return [filename for filename, _ in self.errors]
+
+
+def make_shards(row_count, shard_count):
+    """交错分配行号：第 i 行有 n-1-i 个对战，交错能让各分片工作量接近。"""
+    shard_count = max(1, min(shard_count, row_count))
+    return [range(s, row_count, shard_count) for s in range(shard_count)]
+
+
+def plan_shards(row_count, min_shards=1, pair_count=None):
+    """分片数至少为 min_shards，并保证每片大约不超过 SHARD_PAIRS 个对战。"""
+    if pair_count is None:
+        pair_count = count_pairs(row_count)
+    by_size = -(-pair_count // SHARD_PAIRS)
+    return make_shards(row_count, max(min_shards, by_size))
@@ -0,0 +1,393 @@
+import os
+import json
+import time
+import tempfile
+import mimetypes
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fragments import FragmentCache
+from generator import LEGAL_PAGES, SiteGenerator
+from indexer import HUB_DIR, SEARCH_DIR, SiteIndexer
+from manifest import compute_tool_hashes, diff_tools, hash_text
+from matchups import build_matchups
+from packager import ASSET_DIR, Packager
+from pipeline import PageUrls, PairOwnership, tool_slugs
+from sitemap import INDEX_NAME as SITEMAP_INDEX, SHARD_RE
+
+# Tiandao Preview Server
+# 本地预览：不跑完整构建，也不碰 output/。对战页按请求渲染并放进 LRU 缓存，
+# 首页/Hub/搜索索引和 sitemap 各自整组按需生成。
+# 后台线程轮询 data/、templates/ 和 config.json，只让受影响的缓存失效：
+#   data.csv 某几行变化  -> 只丢弃涉及这些工具的对战页（所有语言版本）
+#   page.html / 配置变化 -> 构建指纹变了才清空对战页；首页和 sitemap 随数据/配置重建
+# 用法：python main.py --serve [--port 8000]
+
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_SIZE = 512
+POLL_INTERVAL = 0.5
+PAIR_SEP = '-vs-'
+
+
+class PageCache:
+    """filename -> (name_a, name_b, body) 的 LRU 缓存。"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, filename):
+        entry = self.entries.get(filename)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(filename)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, filename, name_a, name_b, body):
+        self.entries[filename] = (name_a, name_b, body)
+        self.entries.move_to_end(filename)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def evict_tools(self, names):
+        """丢弃涉及 names 中任一工具的页面，返回丢弃数量。"""
+        stale = [f for f, (a, b, _) in self.entries.items() if a in names or b in names]
+        for filename in stale:
+            del self.entries[filename]
+        return len(stale)
+
+    def clear(self):
+        count = len(self.entries)
+        self.entries.clear()
+        return count
+
+
+class PreviewGenerator(SiteGenerator):
+    """页面渲染到内存（captured），不写 output/；只有哈希样式表写在临时目录里。"""
+
+    def __init__(self, data_path=None, scratch_dir=None):
+        super().__init__(data_path, scratch_dir)
+        # 预览与部署使用相同的 HTML 压缩和 CSS 提取，但不需要 .gz
+        self.packager = Packager(self.output_dir, dict(self.config.get('package', {}), gzip=False))
+        # 临时目录里没有 manifest：lastmod 为空，也不会跨线程共享 SQLite 连接
+        self.manifest.readonly = True
+        self.captured = {}
+
+    def write_if_changed(self, filename, content, previous_digest=None):
+        packed = self.packager.package(filename, content)
+        self.captured[filename] = packed
+        return hash_text(packed)
+
+
+class PreviewSite:
+    """预览站点的全部内存状态；所有方法都在 self.lock 下调用。"""
+
+    def __init__(self, data_path=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.scratch_dir = tempfile.mkdtemp(prefix='tiandao-preview-')
+        self.lock = threading.RLock()
+        self.pages = PageCache(cache_size)
+        self.generator = PreviewGenerator(data_path, self.scratch_dir)
+        self.templates = None
+        self.fingerprint = None
+        self.raw_tools = []
+        self.tool_hashes = {}
+        self.tools = []
+        self.fragments = None
+        self.names = []
+        self.slugs = []
+        self.owners = None
+        self.graph = None
+        self.graph_key = None
+        # 整组生成的页面：首页/Hub/搜索索引、sitemap + robots.txt
+        self.index_files = None
+        self.sitemap_files = None
+        self.reload_template()
+        self.reload_data()
+
+    # ---------- 状态加载 ----------
+
+    def reload_template(self):
+        """重新编译各语言的 page.html；构建指纹变化时清空对战页缓存。"""
+        self.templates = self.generator.load_page_templates()
+        fingerprint = self.generator.build_fingerprint()
+        dropped = 0
+        if fingerprint != self.fingerprint:
+            dropped = self.pages.clear()
+            self.fingerprint = fingerprint
+        return dropped
+
+    def reload_data(self):
+        """重新读取 data.csv，只丢弃内容变化或被删除的工具所在的页面。"""
+        raw = self.generator.load_data()
+        hashes = compute_tool_hashes(raw)
+        changed, removed = diff_tools(self.tool_hashes, hashes)
+        self.raw_tools, self.tool_hashes = raw, hashes
+        self.prepare()
+        return self.pages.evict_tools(changed | removed), len(changed), len(removed)
+
+    def prepare(self):
+        self.tools = self.generator.prepare_tools(self.raw_tools)
+        self.fragments = FragmentCache(self.tools, self.generator.locales)
+        self.names = self.generator.tool_names(self.tools)
+        self.slugs = tool_slugs(self.tools)
+        self.owners = PairOwnership(self.names, self.slugs)
+        # top-k 图只依赖名称、描述、价格和配置：其他列变化时保留
+        key = hash_text(json.dumps([
+            self.generator.config.get('matchups'),
+            [(t.get('Tool_Name'), t.get('Features'), t.get('Description'), t.get('Price')) for t in self.raw_tools],
+        ], default=str))
+        if key != self.graph_key:
+            self.graph, self.graph_key = None, key
+        self.index_files = self.sitemap_files = None
+
+    def matchups(self):
+        if self.graph is None:
+            gen = self.generator
+            self.graph = build_matchups(self.names, self.tools, gen.config, gen.base_dir, self.slugs)
+            print(f"⚔️  Preview matchups: {self.graph.describe()}")
+        self.generator.matchups = self.graph
+        return self.graph
+
+    # ---------- 变化处理 ----------
+
+    def refresh(self, changed):
+        gen = self.generator
+        notes = []
+        config_changed = gen.config_path in changed
+        data_changed = os.path.abspath(gen.data_path) in changed
+        template_changed = any(p.startswith(gen.template_dir + os.sep) for p in changed)
+        other_data = changed - {gen.config_path, os.path.abspath(gen.data_path)}
+        other_data = {p for p in other_data if not p.startswith(gen.template_dir + os.sep)}
+
+        if config_changed:
+            self.generator = gen = PreviewGenerator(gen.data_path, self.scratch_dir)
+        if config_changed or template_changed:
+            notes.append(f"{self.reload_template()} pages dropped (templates/config)")
+        if data_changed:
+            evicted, n_changed, n_removed = self.reload_data()
+            notes.append(f"{n_changed} changed, {n_removed} removed tools, {evicted} pages dropped")
+        elif config_changed:
+            # 联盟链接等依赖配置，重新预处理
+            self.prepare()
+        if other_data:
+            # 例如 tools_raw.csv 的访问量：只影响 top-k 选择
+            self.graph = None
+            self.index_files = self.sitemap_files = None
+        names = ', '.join(sorted(os.path.relpath(p, gen.base_dir) for p in changed))
+        print(f"♻️  {names}: " + ('; '.join(notes) or "matchups/index will be rebuilt"))
+
+    # ---------- 渲染 ----------
+
+    def resolve_pair(self, filename):
+        """a-vs-b.html -> 负责这个文件的 (i, j)；slug 里本身可能含 -vs-，逐个分割点尝试。"""
+        stem = filename[:-len('.html')]
+        positions = self.owners.positions
+        graph = self.matchups()
+        start = 0
+        while True:
+            idx = stem.find(PAIR_SEP, start)
+            if idx < 0:
+                return None
+            rows_a, rows_b = positions.get(stem[:idx]), positions.get(stem[idx + len(PAIR_SEP):])
+            if rows_a and rows_b:
+                j = rows_b[-1]
+                pos = bisect_left(rows_a, j) - 1
+                if pos >= 0 and graph.has_pair(rows_a[pos], j):
+                    return rows_a[pos], j
+            start = idx + 1
+
+    def split_locale(self, path):
+        """es/a-vs-b.html -> (es 的 Locale, 'a-vs-b.html')。"""
+        locales = self.generator.locales
+        for locale in locales[1:]:
+            if path.startswith(locale.prefix):
+                return locale, path[len(locale.prefix):]
+        return locales[0], path
+
+    def render_pair(self, filename, locale, page):
+        body = self.pages.get(filename)
+        if body is not None:
+            return body, 'hit'
+        pair = self.resolve_pair(page)
+        if pair is None:
+            return None, 'miss'
+        i, j = pair
+        records, fragments = self.fragments.locale(locale.code)
+        content = self.generator.render_pair(
+            self.templates[locale.code], records[i], records[j], fragments[i], fragments[j], locale, page,
+        )
+        body = self.generator.packager.package(filename, content).encode('utf-8')
+        self.pages.put(filename, self.names[i], self.names[j], body)
+        return body, 'miss'
+
+    def build_index(self):
+        gen = self.generator
+        self.matchups()
+        gen.captured = {}
+        gen.index_urls = SiteIndexer(gen).build(self.tools)
+        self.index_files = {f: c.encode('utf-8') for f, c in gen.captured.items()}
+
+    def build_sitemap(self):
+        if self.index_files is None:
+            self.build_index()
+        gen = self.generator
+        gen.captured = {}
+        gen.generated_urls = PageUrls(self.matchups())
+        gen.generate_sitemap()
+        gen.generate_robots()
+        files = {f: c.encode('utf-8') for f, c in gen.captured.items()}
+        # 分片由 SitemapWriter 直接写在临时目录里
+        for filename in os.listdir(gen.output_dir):
+            if SHARD_RE.match(filename):
+                with open(os.path.join(gen.output_dir, filename), 'rb') as f:
+                    files[filename] = f.read()
+        self.sitemap_files = files
+
+    def get(self, path):
+        """返回 (body, 来源) ；不存在时 body 为 None。"""
+        path = path.lstrip('/') or 'index.html'
+        top = path.split('/', 1)[0]
+        if top in ('static', ASSET_DIR):
+            root = self.generator.static_dir if top == 'static' else os.path.join(self.scratch_dir, ASSET_DIR)
+            return read_inside(root, path.split('/', 1)[-1]), 'file'
+        if path in LEGAL_PAGES:
+            return LEGAL_PAGES[path].encode('utf-8'), 'static'
+        locale, page = self.split_locale(path)
+        if '/' not in page and PAIR_SEP in page and page.endswith('.html'):
+            return self.render_pair(path, locale, page)
+        if path == 'robots.txt' or path == SITEMAP_INDEX or SHARD_RE.match(path):
+            source = 'hit' if self.sitemap_files is not None else 'miss'
+            if source == 'miss':
+                self.build_sitemap()
+            return self.sitemap_files.get(path), source
+        if path.startswith(('index', HUB_DIR + '/', SEARCH_DIR + '/')):
+            source = 'hit' if self.index_files is not None else 'miss'
+            if source == 'miss':
+                self.build_index()
+            return self.index_files.get(path), source
+        return None, 'miss'
+
+
+def read_inside(root, rel):
+    path = os.path.normpath(os.path.join(root, rel))
+    if not path.startswith(os.path.abspath(root) + os.sep) or not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class Watcher(threading.Thread):
+    """轮询文件的 (mtime, size)，有变化时把变化的路径集合交给 callback。"""
+
+    def __init__(self, paths, callback, interval=POLL_INTERVAL):
+        super().__init__(daemon=True)
+        self.paths = paths
+        self.callback = callback
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.state = self.scan()
+
+    def scan(self):
+        state = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                files = [os.path.join(path, name) for name in os.listdir(path) if not name.startswith('.')]
+            else:
+                files = [path]
+            for filename in files:
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+                if os.path.isfile(filename):
+                    state[os.path.abspath(filename)] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            state = self.scan()
+            changed = {p for p in set(state) | set(self.state) if state.get(p) != self.state.get(p)}
+            self.state = state
+            if changed:
+                try:
+                    self.callback(changed)
+                except Exception as e:
+                    print(f"⚠️ Preview reload failed: {e}")
+
+    def stop(self):
+        self.stopped.set()
+
+
+def make_handler(site):
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.respond(send_body=True)
+
+        def do_HEAD(self):
+            self.respond(send_body=False)
+
+        def respond(self, send_body):
+            path = self.path.split('?', 1)[0].split('#', 1)[0]
+            start = time.perf_counter()
+            try:
+                with site.lock:
+                    body, source = site.get(path)
+            except Exception as e:
+                print(f"⚠️ Error rendering {path}: {e}")
+                self.send_error(500, str(e))
+                return
+            if body is None:
+                self.send_error(404)
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            content_type = mimetypes.guess_type(path if '.' in path.rsplit('/', 1)[-1] else 'index.html')[0]
+            self.send_response(200)
+            self.send_header('Content-Type', content_type or 'application/octet-stream')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('X-Preview-Cache', source)
+            self.send_header('X-Render-Ms', f"{elapsed_ms:.2f}")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            print(f"   {self.command} {self.path} -> {format % args}")
+
+    return PreviewHandler
+
+
+def serve(port=DEFAULT_PORT, host='127.0.0.1', data_path=None, cache_size=DEFAULT_CACHE_SIZE, interval=POLL_INTERVAL):
+    site = PreviewSite(data_path, cache_size)
+    gen = site.generator
+    data_dir = os.path.dirname(os.path.abspath(gen.data_path))
+
+    def on_change(changed):
+        # config.json 所在目录也可能有其它文件，只关心 config.json 本身和 CSV
+        changed = {p for p in changed if p == gen.config_path or p.startswith(gen.template_dir + os.sep)
+                   or p.endswith('.csv')}
+        if changed:
+            with site.lock:
+                site.refresh(changed)
+
+    watcher = Watcher([data_dir, gen.template_dir, gen.config_path], on_change, interval)
+    watcher.start()
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    print(f"👀 Preview at http://{host}:{server.server_port}/ (watching data/, templates/, config.json; Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        server.server_close()
+        print(f"🛑 Preview stopped. Page cache: {site.pages.hits} hits, {site.pages.misses} misses.")
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,141 @@
+import os
+import re
+import gzip
+import hashlib
+import datetime
+from xml.sax.saxutils import escape
+
+# Tiandao Sitemap Writer
+# 流式写入 sitemap 分片：达到 50,000 条或 50MB 时自动切换到新分片，
+# 最后生成 sitemap_index.xml 指向所有分片
+
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+INDEX_NAME = 'sitemap_index.xml'
+SHARD_RE = re.compile(r'^sitemap(-[\w-]+)?\.xml(\.gz)?$')
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+
+
+def format_lastmod(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+class _Shard:
+    """单个分片：先写临时文件，内容没变时保留旧文件不动。"""
+
+    def __init__(self, path, use_gzip):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.raw = open(self.tmp_path, 'wb')
+        # mtime=0 保证相同内容压缩后字节完全一致
+        self.stream = gzip.GzipFile(fileobj=self.raw, mode='wb', mtime=0) if use_gzip else self.raw
+        self.digest = hashlib.sha1()
+        self.count = 0
+        self.size = 0
+        self.lastmod = None
+        self.write(URLSET_OPEN)
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.stream.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+
+    def close(self):
+        self.write(URLSET_CLOSE)
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+        old_digest = None
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                old = f.read()
+            old_digest = hashlib.sha1(gzip.decompress(old) if self.path.endswith('.gz') else old).hexdigest()
+        if old_digest == self.digest.hexdigest():
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.path)
+
+
+class SitemapWriter:
+    def __init__(self, output_dir, base_url, use_gzip=False, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        self.output_dir = output_dir
+        self.base_url = base_url.rstrip('/')
+        self.use_gzip = use_gzip
+        self.max_urls = min(max_urls, MAX_URLS)
+        self.max_bytes = min(max_bytes, MAX_BYTES)
+        self.shards = []
+        self.current = None
+        self.total = 0
+        # 分片组：None 为 sitemap-001.xml ...，其他组为 sitemap-<组名>-001.xml ...
+        self.section = None
+        self.section_shards = 0
+
+    def _open_shard(self):
+        self.section_shards += 1
+        prefix = f"sitemap-{self.section}-" if self.section else "sitemap-"
+        name = f"{prefix}{self.section_shards:03d}.xml" + ('.gz' if self.use_gzip else '')
+        self.current = _Shard(os.path.join(self.output_dir, name), self.use_gzip)
+        self.shards.append((name, self.current))
+
+    def begin_section(self, name):
+        """之后的 URL 写进新的一组分片（例如每个语言一组），当前分片就此结束。"""
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        self.section = name
+        self.section_shards = 0
+
+    def add(self, path, lastmod=None, priority=None):
+        """path 为相对站点根目录的路径；lastmod 为 Unix 时间戳。"""
+        entry = f'<url><loc>{escape(f"{self.base_url}/{path}")}</loc>'
+        day = format_lastmod(lastmod)
+        if day:
+            entry += f'<lastmod>{day}</lastmod>'
+        if priority is not None:
+            entry += f'<priority>{priority}</priority>'
+        entry += '</url>\n'
+
+        size = len(entry.encode('utf-8'))
+        if self.current is not None and (
+            self.current.count >= self.max_urls
+            or self.current.size + size + len(URLSET_CLOSE) > self.max_bytes
+        ):
+            self.current.close()
+            self.current = None
+        if self.current is None:
+            self._open_shard()
+
+        self.current.write(entry)
+        self.current.count += 1
+        if lastmod is not None and (self.current.lastmod is None or lastmod > self.current.lastmod):
+            self.current.lastmod = lastmod
+        self.total += 1
+
+    def close(self):
+        """结束最后一个分片并返回 sitemap_index.xml 的内容。"""
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+        xml = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for name, shard in self.shards:
+            xml += f'<sitemap><loc>{escape(f"{self.base_url}/{name}")}</loc>'
+            day = format_lastmod(shard.lastmod)
+            if day:
+                xml += f'<lastmod>{day}</lastmod>'
+            xml += '</sitemap>\n'
+        xml += '</sitemapindex>\n'
+        self.sweep()
+        return xml
+
+    def sweep(self):
+        """删除旧的分片（包括旧版单文件 sitemap.xml）。"""
+        keep = {name for name, _ in self.shards}
+        for filename in os.listdir(self.output_dir):
+            if SHARD_RE.match(filename) and filename not in keep:
+                os.remove(os.path.join(self.output_dir, filename))
@@ -0,0 +1,215 @@
+import os
+import io
+import csv
+import sys
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+
+# Tiandao Tool Store
+# 把 data.csv / tools_raw.csv 编译成紧凑的二进制快照（可 mmap），源 CSV 不变时直接加载，
+# 不再需要 pandas。快照格式：
+#   MAGIC | uint32 头长度 | JSON 头 | uint32 字符串偏移表 | UTF-8 字符串池 | uint32 单元格索引 (rows x cols)
+# 所有字符串去重并 intern，单元格只保存字符串编号。
+# 可选的 transform（例如 normalize.Normalizer）在编译时整表处理一次，结果和原始快照分开缓存
+
+MAGIC = b'TDSNAP01'
+SNAPSHOT_VERSION = 1
+CACHE_DIR = '.cache'
+# load_data 用来替换缺失值的占位文本
+FILL_VALUE = "Info pending"
+
+# 与 pandas.read_csv 默认的缺失值标记保持一致
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+def is_missing(value):
+    return value is None or value in NA_VALUES
+
+
+class ToolRow(Mapping):
+    """只读的工具记录：只保存快照视图和行号，字段按需从字符串池取出。"""
+    __slots__ = ('_view', '_base')
+
+    def __init__(self, view, row):
+        self._view = view
+        self._base = row * view.width
+
+    def __getitem__(self, key):
+        view = self._view
+        return view.strings[view.cells[self._base + view.columns[key]]]
+
+    def __iter__(self):
+        return iter(self._view.columns)
+
+    def __len__(self):
+        return self._view.width
+
+    def __repr__(self):
+        return f"ToolRow({dict(self)!r})"
+
+
+class _StoreView:
+    __slots__ = ('columns', 'width', 'strings', 'cells')
+
+    def __init__(self, columns, strings, cells):
+        self.columns = columns
+        self.width = len(columns)
+        self.strings = strings
+        self.cells = cells
+
+
+class ToolStore:
+    def __init__(self, source, columns, strings, cells, row_count, handle=None, meta=None):
+        self.source = source
+        self.columns = columns
+        self.strings = strings
+        self.cells = cells
+        self.row_count = row_count
+        self._handle = handle
+        # transform 写入快照头的附加信息（例如规范化统计）
+        self.meta = meta or {}
+        self._view = _StoreView({name: idx for idx, name in enumerate(columns)}, strings, cells)
+
+    def __len__(self):
+        return self.row_count
+
+    @staticmethod
+    def snapshot_path(csv_path, variant=None):
+        folder = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR)
+        suffix = f".{variant}.snap" if variant else '.snap'
+        return os.path.join(folder, os.path.basename(csv_path) + suffix)
+
+    @classmethod
+    def open(cls, csv_path, transform=None):
+        """加载快照；源 CSV 的大小或修改时间（或 transform 的版本）变化时自动重新编译。
+
+        transform 需要有 name、version 属性，调用 transform(columns, rows) 返回 (columns, rows, meta)。
+        """
+        stat = os.stat(csv_path)
+        source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': SNAPSHOT_VERSION}
+        if transform is not None:
+            source['transform'] = [transform.name, transform.version]
+        snap_path = cls.snapshot_path(csv_path, transform.name if transform is not None else None)
+        if os.path.exists(snap_path):
+            try:
+                store = cls.load_snapshot(snap_path)
+                if store.source == source:
+                    return store
+                store.close()
+            except Exception as e:
+                print(f"⚠️ Snapshot unreadable, rebuilding: {e}")
+        cls.compile(csv_path, snap_path, source, transform)
+        return cls.load_snapshot(snap_path)
+
+    @staticmethod
+    def compile(csv_path, snap_path, source, transform=None):
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            columns = next(reader, [])
+            width = len(columns)
+            # 与 on_bad_lines='skip' 一致：字段过多的行丢弃；空行和重复的表头行丢弃
+            records = [
+                record + [''] * (width - len(record))
+                for record in reader
+                if record and len(record) <= width and record != columns
+            ]
+        meta = {}
+        if transform is not None:
+            columns, records, meta = transform(columns, records)
+
+        strings, lookup, cells = [], {}, []
+        for record in records:
+            for value in record:
+                idx = lookup.get(value)
+                if idx is None:
+                    idx = lookup[value] = len(strings)
+                    strings.append(value)
+                cells.append(idx)
+        rows = len(records)
+
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        header = json.dumps({
+            'source': source, 'columns': columns, 'rows': rows, 'strings': len(strings), 'meta': meta,
+        }).encode('utf-8')
+
+        os.makedirs(os.path.dirname(snap_path), exist_ok=True)
+        tmp_path = snap_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(MAGIC)
+            out.write(struct.pack('<I', len(header)))
+            out.write(header)
+            out.write(struct.pack(f'<{len(offsets)}I', *offsets))
+            out.write(b''.join(encoded))
+            out.write(struct.pack(f'<{len(cells)}I', *cells))
+        os.replace(tmp_path, snap_path)
+
+    @classmethod
+    def load_snapshot(cls, snap_path):
+        f = open(snap_path, 'rb')
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        view = memoryview(buf)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("bad snapshot magic")
+        pos = len(MAGIC)
+        (header_len,) = struct.unpack_from('<I', buf, pos)
+        pos += 4
+        header = json.loads(bytes(view[pos:pos + header_len]))
+        pos += header_len
+
+        count = header['strings']
+        offsets = view[pos:pos + 4 * (count + 1)].cast('I')
+        pos += 4 * (count + 1)
+        pool = view[pos:pos + offsets[count]]
+        pos += offsets[count]
+        strings = [sys.intern(str(pool[offsets[i]:offsets[i + 1]], 'utf-8')) for i in range(count)]
+        offsets.release()
+        pool.release()
+
+        cells = view[pos:pos + 4 * header['rows'] * len(header['columns'])].cast('I')
+        view.release()
+        return cls(header['source'], header['columns'], strings, cells, header['rows'], handle=buf,
+                   meta=header.get('meta'))
+
+    def close(self):
+        if self._handle is not None:
+            self.cells.release()
+            self._handle.close()
+            self._handle = None
+
+    def with_fill(self, fill):
+        """返回缺失值已替换为 fill 的视图：只改字符串池，不逐行处理。"""
+        strings = [fill if is_missing(s) else s for s in self.strings]
+        return ToolStore(self.source, self.columns, strings, self.cells, self.row_count, meta=self.meta)
+
+    def rows(self):
+        return [ToolRow(self._view, i) for i in range(self.row_count)]
+
+    def column(self, name):
+        idx = self._view.columns[name]
+        width = self._view.width
+        strings = self.strings
+        return [strings[self.cells[row * width + idx]] for row in range(self.row_count)]
+
+
+def write_rows(csv_path, columns, rows):
+    """把 dict/ToolRow 列表写回 CSV（原子替换）。"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(['' if is_missing(row.get(col)) else row.get(col) for col in columns])
+    tmp_path = csv_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, csv_path)
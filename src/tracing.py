@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import heapq
+from contextlib import contextmanager
+
+# Tiandao Build Tracing
+# 记录每个阶段的耗时、单页渲染/写盘延迟直方图、最慢的页面以及 API 调用计数，
+# 构建结束后写成 JSON 报告（默认 output/ 旁边的 build_report.json），供 CI 追踪趋势。
+# 直方图和最慢页面都可以合并，worker 进程按分片返回，主进程汇总
+
+REPORT_NAME = 'build_report.json'
+PROFILE_NAME = 'build_profile.prof'
+# 延迟分桶上限（毫秒），最后一个桶收集更慢的页面
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+SLOWEST_PAGES = 10
+
+
+def default_report_path(output_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(output_dir)), REPORT_NAME)
+
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        idx = 0
+        while idx < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """按分桶近似：返回第 q 分位所在桶的上限（毫秒）。"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        max_ms = round(self.max * 1000, 3)
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(LATENCY_BUCKETS_MS[idx], max_ms) if idx < len(LATENCY_BUCKETS_MS) else max_ms
+        return max_ms
+
+    def to_dict(self):
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max * 1000, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class SlowestPages:
+    """只保留最慢的 limit 个页面（小顶堆）。"""
+    __slots__ = ('limit', 'heap')
+
+    def __init__(self, limit=SLOWEST_PAGES):
+        self.limit = limit
+        self.heap = []
+
+    def add(self, seconds, filename):
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, (seconds, filename))
+        elif seconds > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (seconds, filename))
+
+    def merge(self, other):
+        for seconds, filename in other.heap:
+            self.add(seconds, filename)
+
+    def to_list(self):
+        return [{'page': filename, 'ms': round(seconds * 1000, 3)}
+                for seconds, filename in sorted(self.heap, reverse=True)]
+
+
+class PageStats:
+    """一个分片的页面级统计；写盘直方图和字节数只由 PageWriter 的线程更新。
+
+    bytes_in / bytes_out / bytes_gz：本次写出的文件在打包（packager.py）前、后以及 .gz 的字节数。
+    """
+    __slots__ = ('render', 'write', 'slowest', 'files', 'bytes_in', 'bytes_out', 'bytes_gz')
+
+    def __init__(self):
+        self.render = LatencyHistogram()
+        self.write = LatencyHistogram()
+        self.slowest = SlowestPages()
+        self.files = self.bytes_in = self.bytes_out = self.bytes_gz = 0
+
+    def add_bytes(self, before, after, compressed=0):
+        self.files += 1
+        self.bytes_in += before
+        self.bytes_out += after
+        self.bytes_gz += compressed
+
+    def merge(self, other):
+        self.render.merge(other.render)
+        self.write.merge(other.write)
+        self.slowest.merge(other.slowest)
+        self.files += other.files
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.bytes_gz += other.bytes_gz
+
+    def to_dict(self):
+        return {
+            'render': self.render.to_dict(),
+            'write': self.write.to_dict(),
+            'slowest_pages': self.slowest.to_list(),
+            'bytes': {
+                'files': self.files, 'before': self.bytes_in, 'after': self.bytes_out, 'gzip': self.bytes_gz,
+            },
+        }
+
+
+class BuildTrace:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.pages = PageStats()
+        self.counters = {}
+        self.extra = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_seconds': round(sum(self.stages.values()), 4),
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'pages': self.pages.to_dict(),
+            'counters': dict(self.counters),
+            **self.extra,
+        }
+
+    def summary(self):
+        print("⏱️  Build trace:")
+        for name, seconds in self.stages.items():
+            print(f"   {name:<18} {seconds:8.3f}s")
+        render = self.pages.render
+        if render.count:
+            print(f"   render p50 {render.percentile(0.5)}ms, p95 {render.percentile(0.95)}ms, "
+                  f"max {render.max * 1000:.1f}ms over {render.count} pages")
+            slowest = self.pages.slowest.to_list()[:3]
+            print("   slowest: " + ", ".join(f"{p['page']} ({p['ms']}ms)" for p in slowest))
+        pages = self.pages
+        if pages.files:
+            saved = 1 - pages.bytes_out / pages.bytes_in if pages.bytes_in else 0
+            gz = f", gzip {pages.bytes_gz / 1e6:.2f} MB" if pages.bytes_gz else ""
+            print(f"   wrote {pages.files} files: {pages.bytes_in / 1e6:.2f} MB -> "
+                  f"{pages.bytes_out / 1e6:.2f} MB ({saved:.0%} smaller){gz}")
+        if self.counters:
+            print("   " + ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+
+    def write(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
@@ -1,62 +1,114 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
+from html import escape
+from toolstore import ToolStore
+from normalize import Normalizer, monthly_prices
 
-def generate_charts(csv_file, output_dir, config):
+# Tiandao Visualizer v2.0
+# 轻量 SVG 价格对比图：不依赖 matplotlib，价格与页面一样取 normalize 的月付价格，
+# 可以在 generate_pages 渲染对战页的同一轮里为每一对生成内联图表。
+# 需要 PNG 时可选 backend='png'（此时才导入 matplotlib）
+
+CHEAP_COLOR = '#22c55e'
+EXPENSIVE_COLOR = '#ef4444'
+
+CHART_TEMPLATE = (
+    '<svg class="price-chart" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 360 220" width="360" height="220" '
+    'role="img" aria-label="{caption}: {label_a} {value_a}, {label_b} {value_b}">'
+    '<text x="180" y="20" text-anchor="middle" font-size="13" fill="#94a3b8">{title}</text>'
+    '<line x1="30" y1="180" x2="330" y2="180" stroke="#334155"/>'
+    '{bars}'
+    '</svg>'
+)
+BAR_TEMPLATE = (
+    '<rect x="{x}" y="{y}" width="90" height="{h}" rx="4" fill="{color}"/>'
+    '<text x="{cx}" y="{ty}" text-anchor="middle" font-size="13" font-weight="bold" fill="#f1f5f9">{value}</text>'
+    '<text x="{cx}" y="200" text-anchor="middle" font-size="12" fill="#cbd5e1">{label}</text>'
+)
+
+
+def format_price(price):
+    return f"${int(price)}" if price == int(price) else f"${price:.2f}"
+
+
+def render_price_chart(name_a, price_a, name_b, price_b, title="Monthly Price Comparison", caption="Monthly price"):
+    """两个工具的价格柱状图（内联 SVG）。任一价格缺失时返回空字符串。title/caption 随页面语言变化。"""
+    if price_a is None or price_b is None:
+        return ""
+    prices = [price_a, price_b]
+    top = max(prices) or 1.0
+    bars = []
+    for idx, (name, price) in enumerate(((name_a, price_a), (name_b, price_b))):
+        # 价格低的显示绿色，价格高的显示红色
+        color = CHEAP_COLOR if price == min(prices) else EXPENSIVE_COLOR
+        h = round(140 * price / top, 1)
+        x = 60 + idx * 150
+        bars.append(BAR_TEMPLATE.format(
+            x=x, y=round(180 - h, 1), h=h, color=color, cx=x + 45, ty=round(174 - h, 1),
+            value=format_price(price), label=escape(name[:18]),
+        ))
+    return CHART_TEMPLATE.format(
+        title=title, caption=caption, label_a=escape(name_a), value_a=format_price(price_a),
+        label_b=escape(name_b), value_b=format_price(price_b),
+        bars=''.join(bars),
+    )
+
+
+def save_png_chart(path, name_a, price_a, name_b, price_b):
+    """兼容旧版输出的 PNG 后端。"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    prices = [price_a, price_b]
+    colors = [CHEAP_COLOR if p == min(prices) else EXPENSIVE_COLOR for p in prices]
+    plt.style.use('ggplot')
+    fig, ax = plt.subplots(figsize=(6, 4))
+    bars = ax.bar([name_a, name_b], prices, color=colors, width=0.5)
+    ax.set_title('Monthly Price Comparison', fontsize=10)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height, f'${int(height)}', ha='center', va='bottom')
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+
+
+def generate_charts(csv_file, output_dir, config, backend='svg'):
     print("🎨 [Visualizer] Drawing charts...")
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
+
     if not os.path.exists(csv_file):
         print("⚠️ No data file found for visualization.")
         return
 
-    df = pd.read_csv(csv_file)
-    plt.style.use('ggplot')
+    store = ToolStore.open(csv_file, transform=Normalizer())
+    rows = [row for row in store.rows() if row.get('Tool_Name') and row['Tool_Name'] != 'Tool_Name']
+    names = [row['Tool_Name'] for row in rows]
+    prices = monthly_prices(rows)
+
     hero = config['hero_product']
-    
-    # 获取 Hero 价格
-    try:
-        hero_row = df[df['Tool_Name'] == hero]
-        if not hero_row.empty:
-            hero_price = float(hero_row['Price'].values[0])
-        else:
-            hero_price = 0.0
-    except:
+    hero_price = next((p for n, p in zip(names, prices) if n == hero), None)
+    if hero_price is None:
         hero_price = 0.0
 
-    for index, row in df.iterrows():
-        comp = row['Tool_Name']
-        if comp == hero: continue
-        
+    drawn = 0
+    for comp, comp_price in zip(names, prices):
+        if comp == hero:
+            continue
+        if comp_price is None:
+            print(f"   ⚠️ Could not draw chart for {comp}: unparseable price")
+            continue
+        slug = f"{hero.lower()}-vs-{comp.lower().replace(' ', '-')}"
         try:
-            comp_price = float(row['Price'])
-            
-            names = [hero, comp]
-            prices = [hero_price, comp_price]
-            
-            # 修复点：正确的颜色判断逻辑
-            # 价格低的显示绿色(#22c55e)，价格高的显示红色(#ef4444)
-            colors = []
-            for p in prices:
-                if p == min(prices):
-                    colors.append('#22c55e')
-                else:
-                    colors.append('#ef4444')
-
-            fig, ax = plt.subplots(figsize=(6, 4))
-            bars = ax.bar(names, prices, color=colors, width=0.5)
-            ax.set_title('Monthly Price Comparison', fontsize=10)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height, f'${int(height)}', ha='center', va='bottom')
-
-            slug = f"{hero.lower()}-vs-{comp.lower().replace(' ', '-')}"
-            plt.savefig(f"{output_dir}/{slug}.png", dpi=100)
-            plt.close()
+            if backend == 'png':
+                save_png_chart(f"{output_dir}/{slug}.png", hero, hero_price, comp, comp_price)
+            else:
+                with open(f"{output_dir}/{slug}.svg", 'w', encoding='utf-8') as f:
+                    f.write(render_price_chart(hero, hero_price, comp, comp_price))
+            drawn += 1
         except Exception as e:
             # 打印错误但不中断整个流程
-            print(f"   ⚠️ Could not draw chart for {comp}: {e}")
\ No newline at end of file
+            print(f"   ⚠️ Could not draw chart for {comp}: {e}")
+    print(f"   {drawn} charts written ({backend}).")
\ No newline at end of file